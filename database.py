@@ -39,18 +39,28 @@ else:
     logger.warning("Database credentials not found in environment. Using SQLite fallback for development")
 
 # --- 3. CREATE ENGINE ---
+# Pool is sized to cover FastAPI's worker threadpool (40 threads by default)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "25"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "25"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
 logger.info("Creating database engine...")
 try:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
         pool_pre_ping=True,
         echo=False,  # Set to True for debugging SQL queries
-        pool_size=10,  # Maximum number of connections
-        max_overflow=20,  # Allow 20 additional connections
-        pool_recycle=3600,  # Recycle connections after 1 hour
+        pool_size=DB_POOL_SIZE,  # Persistent connections kept open
+        max_overflow=DB_MAX_OVERFLOW,  # Extra connections allowed under burst load
+        pool_timeout=DB_POOL_TIMEOUT,  # Fail fast instead of queueing for 30s
+        pool_recycle=DB_POOL_RECYCLE,  # Recycle before MySQL's wait_timeout closes them
     )
     logger.info("Database engine created successfully")
-    logger.debug(f"Connection pool configured: size=10, max_overflow=20, recycle=3600s")
+    logger.debug(
+        f"Connection pool configured: size={DB_POOL_SIZE}, max_overflow={DB_MAX_OVERFLOW}, "
+        f"timeout={DB_POOL_TIMEOUT}s, recycle={DB_POOL_RECYCLE}s"
+    )
 except Exception as e:
     logger.critical(f"Failed to create database engine: {str(e)}", exc_info=True)
     raise
@@ -85,10 +95,9 @@ logger.info("Database session factory configured")
 # Dependency to get the database session (FastAPI compatible)
 def get_db() -> Generator:
     """Provides a database session with logging."""
-    session_id = id(SessionLocal())  # Generate unique session identifier
-    logger.debug(f"Creating database session [ID: {session_id}]")
-
     db = SessionLocal()
+    session_id = id(db)  # Unique session identifier for log correlation
+    logger.debug(f"Creating database session [ID: {session_id}]")
 
     try:
         logger.debug(f"Database session active [ID: {session_id}]")
@@ -1,8 +1,7 @@
 # main.py
 from fastapi import FastAPI, Request
-from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse, FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import RedirectResponse, FileResponse, HTMLResponse, ORJSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 import os
 from pathlib import Path
@@ -11,6 +10,7 @@ import time
 
 from routers import auth, overview, task_manager, inventory, logistics, reports, mechanic
 from utils.logger import setup_logger
+from utils.templating import warm_templates
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -71,7 +71,7 @@ async def get_icon(icon_name: str):
                 "Access-Control-Allow-Origin": "*"
             }
         )
-    return JSONResponse({"error": "Icon not found"}, status_code=404)
+    return ORJSONResponse({"error": "Icon not found"}, status_code=404)
 
 
 # Offline fallback page
@@ -104,9 +104,6 @@ async def offline_page():
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Setup Jinja2 templates
-templates = Jinja2Templates(directory="templates")
-
 # Include routers
 app.include_router(auth.router)
 app.include_router(overview.router)
@@ -117,6 +114,13 @@ app.include_router(reports.router)
 app.include_router(mechanic.router)
 
 
+# Compile templates once at startup
+@app.on_event("startup")
+async def load_templates():
+    warm_templates()
+    logger.info("Templates compiled and cached")
+
+
 # Root redirect
 @app.get("/")
 async def root(request: Request):
@@ -167,7 +167,10 @@ class SalesRecord(Base):
     __table_args__ = (
         UniqueConstraint('Branch_ID', 'DC_Number', name='uq_branch_dc_number'), 
         Index('idx_fulfillment_status', 'fulfillment_status'),
-        Index('idx_pdi_assigned_to', 'pdi_assigned_to'),
+        Index('idx_assigned_status', 'pdi_assigned_to', 'fulfillment_status'),
+        Index('idx_branch_assigned_completion', 'Branch_ID', 'pdi_assigned_to', 'pdi_completion_date'),
+        Index('idx_branch_status_completion', 'Branch_ID', 'fulfillment_status', 'pdi_completion_date'),
+        Index('idx_branch_status_timestamp', 'Branch_ID', 'fulfillment_status', 'Timestamp'),
     )
     
     id = Column(Integer, primary_key=True, index=True)
@@ -214,7 +217,7 @@ class SalesRecord(Base):
     engine_no = Column(String(100), nullable=True, index=True)
     chassis_no = Column(String(100), nullable=True, index=True)
     
-    pdi_assigned_to = Column(String(100), nullable=True, index=True)
+    pdi_assigned_to = Column(String(100), nullable=True)
     pdi_completion_date = Column(DateTime, nullable=True)
     is_insurance_done = Column(Boolean, default=False, nullable=False)
     is_tr_done = Column(Boolean, default=False, nullable=False)
@@ -229,6 +232,12 @@ class SalesRecord(Base):
 class InventoryTransaction(Base):
     """The central transaction ledger for inventory movements."""
     __tablename__ = "inventory_transactions"
+    __table_args__ = (
+        Index('idx_txn_branch_type_date_load', 'Current_Branch_ID', 'Transaction_Type', 'Date', 'Load_Number'),
+        Index('idx_txn_from_branch_date', 'From_Branch_ID', 'Date'),
+        Index('idx_txn_to_branch_date', 'To_Branch_ID', 'Date'),
+        Index('idx_txn_type_date', 'Transaction_Type', 'Date'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     Timestamp = Column(DateTime, default=lambda: datetime.now(IST_TIMEZONE))
@@ -245,6 +254,10 @@ class InventoryTransaction(Base):
     Load_Number = Column(String(50))
     Remarks = Column(String(255))
 
+    from_branch = relationship("Branch", foreign_keys=[From_Branch_ID])
+    current_branch = relationship("Branch", foreign_keys=[Current_Branch_ID])
+    to_branch = relationship("Branch", foreign_keys=[To_Branch_ID])
+
 # --- 4. NEW: VEHICLE MASTER TABLE ---
 
 class VehicleMaster(Base):
@@ -253,6 +266,12 @@ class VehicleMaster(Base):
     Tracked by chassis_no. This is the new source of truth for inventory.
     """
     __tablename__ = "vehicle_master"
+
+    __table_args__ = (
+        Index('idx_vm_branch_status_model', 'current_branch_id', 'status', 'model'),
+        Index('idx_vm_load_status_date', 'load_reference_number', 'status', 'date_received'),
+        Index('idx_vm_status_date', 'status', 'date_received'),
+    )
     
     id = Column(Integer, primary_key=True)
     chassis_no = Column(String(100), unique=True, nullable=False, index=True)
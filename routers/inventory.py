@@ -1,39 +1,16 @@
 # routers/inventory.py
 from fastapi import APIRouter, Request, Depends, Query, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from database import get_db
 from services import branch_service, stock_service
 from models import VehicleMaster, Branch
+from routers.overview import check_auth, get_active_context
+from utils.templating import templates
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
-templates = Jinja2Templates(directory="templates")
-
-
-def check_auth(request: Request):
-    if not request.session.get("logged_in"):
-        return False
-    return True
-
-
-def get_active_context(request: Request, db: Session):
-    """Get the active branch context for the user"""
-    user_branch_id = request.session.get("branch_id")
-
-    if user_branch_id:
-        return user_branch_id
-
-    active_context = request.session.get("active_context")
-    if not active_context:
-        head_branches = branch_service.get_head_branches(db)
-        if head_branches:
-            active_context = head_branches[0].Branch_ID
-            request.session["active_context"] = active_context
-
-    return active_context
 
 
 @router.get("/stock-levels", response_class=HTMLResponse)
@@ -48,7 +25,7 @@ async def stock_levels(request: Request, db: Session = Depends(get_db)):
 
     # Get active context
     active_branch_id = get_active_context(request, db)
-    active_branch = db.query(Branch).filter(Branch.Branch_ID == active_branch_id).first()
+    active_branch = db.get(Branch, active_branch_id) if active_branch_id else None
     branch_name = active_branch.Branch_Name if active_branch else "N/A"
 
     # Get managed branches
@@ -110,12 +87,11 @@ async def vehicle_locator(request: Request, db: Session = Depends(get_db)):
 
     # Get active context
     active_branch_id = get_active_context(request, db)
-    active_branch = db.query(Branch).filter(Branch.Branch_ID == active_branch_id).first()
+    active_branch = db.get(Branch, active_branch_id) if active_branch_id else None
     branch_name = active_branch.Branch_Name if active_branch else "N/A"
 
     # Get managed branches
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    branch_ids = branch_service.get_managed_branch_ids(db, active_branch_id)
 
     # Get master data for dropdowns
     master_data = stock_service.get_vehicle_master_data(db)
@@ -153,12 +129,11 @@ async def search_vehicles(
 
     # Get active context
     active_branch_id = get_active_context(request, db)
-    active_branch = db.query(Branch).filter(Branch.Branch_ID == active_branch_id).first()
+    active_branch = db.get(Branch, active_branch_id) if active_branch_id else None
     branch_name = active_branch.Branch_Name if active_branch else "N/A"
 
     # Get managed branches
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    branch_ids = branch_service.get_managed_branch_ids(db, active_branch_id)
 
     # Use existing service to search
     if search_mode == "chassis":
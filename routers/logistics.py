@@ -1,8 +1,8 @@
 # routers/logistics.py - Clean Receive and Transfer functionality with caching
 from fastapi import APIRouter, Request, Depends, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func
 from datetime import datetime, timedelta
 import time
 
@@ -10,10 +10,11 @@ from database import get_db
 from models import VehicleMaster, Branch, InventoryTransaction, TransactionType
 from services import branch_service, email_service, stock_service
 from routers.overview import get_active_context, get_context_data, check_auth
+from utils.cache import clear_report_caches
 from utils import constants as constants
+from utils.templating import templates
 
-router = APIRouter(prefix="/logistics", tags=["logistics"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(prefix="/logistics", tags=["logistics"], default_response_class=ORJSONResponse)
 
 # Cache for available vehicles
 _vehicle_cache = {}
@@ -41,7 +42,7 @@ def get_cached_available_vehicles(db: Session, branch_ids: list) -> list:
     # Convert to serializable dictionaries with branch info
     available_vehicles = []
     for vehicle in available_vehicles_query:
-        branch = db.query(Branch).filter(Branch.Branch_ID == vehicle.current_branch_id).first()
+        branch = db.get(Branch, vehicle.current_branch_id) if vehicle.current_branch_id else None
         available_vehicles.append({
             'chassis_no': vehicle.chassis_no,
             'engine_no': vehicle.engine_no,
@@ -76,34 +77,29 @@ async def receive_inward(
     context = get_context_data(request, db)
     active_branch_id = context["active_context"]
 
-    # Get pending loads using stock_service
-    pending_load_refs = stock_service.get_pending_loads(db, str(active_branch_id))
+    # Get pending loads with their vehicles in one streamed query
+    pending_loads = stock_service.get_in_transit_vehicles_by_load(db, str(active_branch_id))
 
-    # Build loads data with vehicle details
-    loads_data = []
-    for load_ref in pending_load_refs:
-        # Use stock_service to get vehicles in this load
-        vehicles_df = stock_service.get_vehicles_in_load(
-            db=db,
-            branch_id=str(active_branch_id),
-            load_reference=load_ref
-        )
-
-        if not vehicles_df.empty:
-            vehicles_list = vehicles_df.to_dict('records')
-            loads_data.append({
-                "load_reference": load_ref,
-                "source_branch": "HMSI",
-                "expected_date": datetime.now().strftime("%Y-%m-%d"),
-                "vehicle_count": len(vehicles_list),
-                "all_received": False,
-                "vehicles": vehicles_list
-            })
+    now = datetime.now()
+    today = now.date()
+    expected_date = now.strftime("%Y-%m-%d")
 
-    total_expected = sum(load['vehicle_count'] for load in loads_data)
+    # Build loads data with vehicle details (totals computed in the same pass)
+    loads_data = []
+    total_expected = 0
+    for load_ref, vehicles_list in pending_loads.items():
+        vehicle_count = len(vehicles_list)
+        total_expected += vehicle_count
+        loads_data.append({
+            "load_reference": load_ref,
+            "source_branch": "HMSI",
+            "expected_date": expected_date,
+            "vehicle_count": vehicle_count,
+            "all_received": False,
+            "vehicles": vehicles_list
+        })
 
     # Get today's receipts
-    today = datetime.now().date()
     today_received = db.query(InventoryTransaction).filter(
         InventoryTransaction.Current_Branch_ID == active_branch_id,
         InventoryTransaction.Transaction_Type == "HMSI",
@@ -111,26 +107,32 @@ async def receive_inward(
     ).count()
 
     # Get recent receipts (vehicles received in last 7 days)
-    recent_date = datetime.now() - timedelta(days=7)
-    recent_receipts = db.query(InventoryTransaction).filter(
+    recent_date = today - timedelta(days=7)
+    # Only the 5 most recent loads are displayed, so limit in SQL and
+    # format/count just those rows
+    received_on = func.max(InventoryTransaction.Date).label("received_on")
+    recent_receipts = db.query(
+        InventoryTransaction.Load_Number,
+        received_on
+    ).filter(
         InventoryTransaction.Current_Branch_ID == active_branch_id,
         InventoryTransaction.Transaction_Type == "HMSI",
-        InventoryTransaction.Date >= recent_date.date()
-    ).group_by(InventoryTransaction.Load_Number).all()
+        InventoryTransaction.Date >= recent_date,
+        InventoryTransaction.Load_Number.isnot(None)
+    ).group_by(InventoryTransaction.Load_Number).order_by(received_on.desc()).limit(5).all()
 
     recent_data = []
     for receipt in recent_receipts:
-        if receipt.Load_Number:
-            vehicle_count = db.query(InventoryTransaction).filter(
-                InventoryTransaction.Load_Number == receipt.Load_Number,
-                InventoryTransaction.Current_Branch_ID == active_branch_id
-            ).count()
-
-            recent_data.append({
-                "load_reference": receipt.Load_Number,
-                "vehicle_count": vehicle_count,
-                "received_at": receipt.Date.strftime("%Y-%m-%d")
-            })
+        vehicle_count = db.query(InventoryTransaction).filter(
+            InventoryTransaction.Load_Number == receipt.Load_Number,
+            InventoryTransaction.Current_Branch_ID == active_branch_id
+        ).count()
+
+        recent_data.append({
+            "load_reference": receipt.Load_Number,
+            "vehicle_count": vehicle_count,
+            "received_at": receipt.received_on.strftime("%Y-%m-%d")
+        })
 
     return templates.TemplateResponse(
         "logistics_receive.html",
@@ -140,7 +142,7 @@ async def receive_inward(
             "pending_loads": loads_data,
             "total_expected": total_expected,
             "today_received": today_received,
-            "recent_receipts": recent_data[:5],
+            "recent_receipts": recent_data,
             "unprocessed_emails": 0,
             "current_page": "logistics"
         }
@@ -184,6 +186,7 @@ async def receive_load_form(
         )
 
         if success:
+            clear_report_caches()
             return RedirectResponse(
                 url="/logistics/receive?success=true",
                 status_code=303
@@ -225,15 +228,17 @@ async def transfer_stock(
         VehicleMaster.status == "In Stock"
     ).all()
 
-    # Recent transfers
-    recent_transfers = db.query(InventoryTransaction).filter(
+    # Recent transfers, destination branches loaded in one batch
+    recent_transfers = db.query(InventoryTransaction).options(
+        selectinload(InventoryTransaction.to_branch)
+    ).filter(
         InventoryTransaction.From_Branch_ID == active_branch_id,
         InventoryTransaction.Transaction_Type == "OUTWARD"
     ).order_by(InventoryTransaction.Date.desc()).limit(10).all()
 
     transfers = []
     for txn in recent_transfers:
-        to_branch = db.query(Branch).filter(Branch.Branch_ID == txn.To_Branch_ID).first()
+        to_branch = txn.to_branch
         transfers.append({
             'load_number': txn.Load_Number,
             'to_branch': to_branch.Branch_Name if to_branch else 'Unknown',
@@ -321,6 +326,8 @@ async def transfer_batch(
                 chassis_list=chassis_numbers
             )
 
+            clear_report_caches()
+
             # Success - redirect with success parameters
             return RedirectResponse(
                 url=f"/logistics/transfer?success=true&count={len(chassis_numbers)}&dc={dc_number}",
@@ -436,8 +443,7 @@ async def create_manual_sale(
         active_branch_id = context["active_context"]
 
         # Validate that all chassis numbers belong to managed branches
-        managed_branches = branch_service.get_managed_branches(db, str(active_branch_id))
-        managed_branch_ids = [branch.Branch_ID for branch in managed_branches]
+        managed_branch_ids = branch_service.get_managed_branch_ids(db, str(active_branch_id))
 
         sale_date = datetime.strptime(sale_date_str, "%Y-%m-%d").date() if sale_date_str else datetime.now().date()
 
@@ -456,7 +462,7 @@ async def create_manual_sale(
 
             # Check if vehicle belongs to a managed branch
             if vehicle.current_branch_id not in managed_branch_ids:
-                branch = db.query(Branch).filter(Branch.Branch_ID == vehicle.current_branch_id).first()
+                branch = db.get(Branch, vehicle.current_branch_id) if vehicle.current_branch_id else None
                 branch_name = branch.Branch_Name if branch else vehicle.current_branch_id
                 return RedirectResponse(
                     url=f"/logistics/manual-sale?error=unmanaged_branch&chassis={chassis_no}&branch={branch_name}",
@@ -473,6 +479,7 @@ async def create_manual_sale(
             )
 
             if success:
+                clear_report_caches()
                 return RedirectResponse(
                     url=f"/logistics/manual-sale?success=true&count={len(chassis_numbers)}",
                     status_code=303
@@ -509,7 +516,7 @@ async def sync_emails(
     """Manually trigger email sync to fetch new loads from S08 attachments"""
 
     if not check_auth(request):
-        return JSONResponse({"success": False, "error": "Unauthorized"}, status_code=401)
+        return ORJSONResponse({"success": False, "error": "Unauthorized"}, status_code=401)
 
     try:
         context = get_context_data(request, db)
@@ -536,7 +543,7 @@ async def sync_emails(
         email_config = email_configs.get(active_branch_id)
 
         if not email_config:
-            return JSONResponse({
+            return ORJSONResponse({
                 "success": False,
                 "error": f"Email sync is not configured for this branch (ID: {active_branch_id})",
                 "new_loads": 0
@@ -561,7 +568,7 @@ async def sync_emails(
             total_vehicles = len(vehicle_data_list)
             total_loads = len(loads_created)
 
-            return JSONResponse({
+            return ORJSONResponse({
                 "success": True,
                 "message": f"Successfully synced {total_loads} load(s) with {total_vehicles} vehicle(s)",
                 "new_loads": total_loads,
@@ -570,7 +577,7 @@ async def sync_emails(
                 "logs": logs[-10:]
             })
         else:
-            return JSONResponse({
+            return ORJSONResponse({
                 "success": True,
                 "message": f"No new emails found for {email_config['name']}",
                 "new_loads": 0,
@@ -584,7 +591,7 @@ async def sync_emails(
         error_detail = traceback.format_exc()
         print(f"[EMAIL SYNC ERROR] {error_detail}")
 
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "error": f"Error syncing emails: {str(e)}",
             "new_loads": 0
@@ -602,13 +609,13 @@ async def get_vehicle_details(
     """Get vehicle details by chassis number"""
 
     if not check_auth(request):
-        return JSONResponse({"success": False, "message": "Unauthorized"}, status_code=401)
+        return ORJSONResponse({"success": False, "message": "Unauthorized"}, status_code=401)
 
     # Check cache first
     if chassis_no in _vehicle_details_cache:
         cache_time = _vehicle_details_cache[chassis_no].get('_cached_at', 0)
         if time.time() - cache_time < 300:  # 5 minute cache
-            return JSONResponse(_vehicle_details_cache[chassis_no])
+            return ORJSONResponse(_vehicle_details_cache[chassis_no])
 
     try:
         vehicle = db.query(VehicleMaster).filter(
@@ -616,7 +623,7 @@ async def get_vehicle_details(
         ).first()
 
         if not vehicle:
-            return JSONResponse({
+            return ORJSONResponse({
                 "success": False,
                 "message": f"Vehicle with chassis number {chassis_no} not found"
             }, status_code=404)
@@ -642,10 +649,10 @@ async def get_vehicle_details(
         # Cache the result
         _vehicle_details_cache[chassis_no] = vehicle_data
 
-        return JSONResponse(vehicle_data)
+        return ORJSONResponse(vehicle_data)
 
     except Exception as e:
-        return JSONResponse({
+        return ORJSONResponse({
             "success": False,
             "message": f"Error fetching vehicle details: {str(e)}"
         }, status_code=500)
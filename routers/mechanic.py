@@ -1,76 +1,60 @@
 # routers/mechanic.py
 from fastapi import APIRouter, Request, Depends, Form, Query
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.orm import Session, load_only
 
 from database import get_db
 from services import sales_service
-from models import SalesRecord, VehicleMaster, Branch
-from routers.overview import check_auth, get_context_data
+from models import SalesRecord, VehicleMaster
+from routers.overview import SessionUser, current_user, current_context
+from utils.cache import clear_report_caches
+from utils.templating import templates
 
 router = APIRouter(prefix="/mechanic", tags=["mechanic"])
-templates = Jinja2Templates(directory="templates")
+
+COMPLETION_DATE_FORMAT = '%d-%b-%Y %I:%M %p'
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def mechanic_dashboard(
+def mechanic_dashboard(
         request: Request,
+        context: dict = Depends(current_context),
         db: Session = Depends(get_db)
 ):
     """Mechanic Dashboard - View assigned PDI work"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-
     # Get mechanic username from session
-    mechanic_username = request.session.get("username")
+    mechanic_username = context["username"]
     branch_id = str(context["active_context"])
 
-    # Get branch name
-    branch = db.query(Branch).filter(Branch.Branch_ID == int(branch_id)).first()
-    branch_name = branch.Branch_Name if branch else "Unknown"
-
-    # Get pending sales records assigned to this mechanic (now returns list of dicts)
-    pending_records = sales_service.get_sales_records_for_mechanic(db, mechanic_username, branch_id)
+    # Pending and recently completed (last 48 hours) records in one lean query
+    pending_records, completed_records = sales_service.get_mechanic_worklist(
+        db, mechanic_username, branch_id
+    )
 
     # Transform to template format
-    pending_tasks = []
-    for record in pending_records:
-        pending_tasks.append({
+    pending_tasks = [
+        {
             'id': record['id'],
-            'dc_number': record.get('dc_number') or 'N/A',
-            'chassis': record.get('chassis_no') or 'Not Scanned',
-            'engine': record.get('engine_no') or 'N/A',
-            'customer': record.get('customer_name') or 'N/A',
-            'model': record.get('model') or 'N/A',
-            'variant': record.get('variant') or 'N/A',
-            'color': record.get('color') or 'N/A',
-        })
-
-    # Get completed records (last 48 hours, now returns list of dicts)
-    completed_records = sales_service.get_completed_sales_last_48h(db, branch_id)
-
-    # Filter for this mechanic's completed work
-    completed_tasks = []
-    for record in completed_records:
-        if record.get('pdi_assigned_to') == mechanic_username and record.get('pdi_completion_date'):
-            completion_date = record['pdi_completion_date']
-            if isinstance(completion_date, datetime):
-                formatted_date = completion_date.strftime('%d-%b-%Y %I:%M %p')
-            else:
-                formatted_date = str(completion_date)
-
-            completed_tasks.append({
-                'dc_number': record.get('dc_number') or 'N/A',
-                'chassis': record.get('chassis_no') or 'N/A',
-                'engine': record.get('engine_no') or 'N/A',
-                'model': record.get('model') or 'N/A',
-                'completion_date': formatted_date
-            })
+            'dc_number': record['dc_number'] or 'N/A',
+            'chassis': record['chassis_no'] or 'Not Scanned',
+            'engine': record['engine_no'] or 'N/A',
+            'customer': record['customer_name'] or 'N/A',
+            'model': record['model'] or 'N/A',
+            'variant': record['variant'] or 'N/A',
+            'color': record['color'] or 'N/A',
+        } for record in pending_records
+    ]
+
+    completed_tasks = [
+        {
+            'dc_number': record['dc_number'] or 'N/A',
+            'chassis': record['chassis_no'] or 'N/A',
+            'engine': record['engine_no'] or 'N/A',
+            'model': record['model'] or 'N/A',
+            'completion_date': record['pdi_completion_date'].strftime(COMPLETION_DATE_FORMAT)
+        } for record in completed_records
+    ]
 
     # Stats
     total_pending = len(pending_tasks)
@@ -85,51 +69,67 @@ async def mechanic_dashboard(
             "completed_tasks": completed_tasks,
             "total_pending": total_pending,
             "total_completed": total_completed,
-            "branch_name": branch_name,
             "current_page": "mechanic"
         }
     )
 
 
 @router.get("/pdi/{sale_id}", response_class=HTMLResponse)
-async def pdi_work_form(
+def pdi_work_form(
         request: Request,
         sale_id: int,
+        context: dict = Depends(current_context),
         db: Session = Depends(get_db)
 ):
     """PDI Completion Form"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-
-    # Get sales record
-    sales_record: SalesRecord = db.query(SalesRecord).filter(SalesRecord.id == sale_id).first()
+    # Get sales record (only the columns the form and checks use)
+    sales_record: SalesRecord = db.get(
+        SalesRecord,
+        sale_id,
+        options=[
+            load_only(
+                SalesRecord.id,
+                SalesRecord.Branch_ID,
+                SalesRecord.DC_Number,
+                SalesRecord.Timestamp,
+                SalesRecord.Customer_Name,
+                SalesRecord.Model,
+                SalesRecord.Variant,
+                SalesRecord.Paint_Color,
+                SalesRecord.chassis_no,
+                SalesRecord.pdi_assigned_to
+            )
+        ]
+    )
 
     if not sales_record:
         return RedirectResponse(url="/mechanic/dashboard?error=Record not found")
 
     # Verify this record is assigned to the logged-in mechanic
-    mechanic_username = request.session.get("username")
+    mechanic_username = context["username"]
     if sales_record.pdi_assigned_to != mechanic_username:
         return RedirectResponse(url="/mechanic/dashboard?error=Not authorized for this task")
 
-    # Get available vehicles for this branch matching model/variant/color
-    available_vehicles = db.query(VehicleMaster).filter(
-        VehicleMaster.status == 'In Stock',
-        VehicleMaster.current_branch_id == sales_record.Branch_ID,
-        VehicleMaster.model == sales_record.Model,
-        VehicleMaster.variant == sales_record.Variant,
-        VehicleMaster.color == sales_record.Paint_Color
-    ).all()
-
-    # Also get all in-stock vehicles at this branch (fallback)
-    all_available = db.query(VehicleMaster).filter(
+    # Get all in-stock vehicles at this branch in one query (small, single-branch set)
+    all_available = db.query(
+        VehicleMaster.chassis_no,
+        VehicleMaster.model,
+        VehicleMaster.variant,
+        VehicleMaster.color
+    ).filter(
         VehicleMaster.status == 'In Stock',
         VehicleMaster.current_branch_id == sales_record.Branch_ID
     ).all()
 
+    # Narrow down to vehicles matching model/variant/color
+    available_vehicles = [
+        v for v in all_available
+        if v.model == sales_record.Model
+        and v.variant == sales_record.Variant
+        and v.color == sales_record.Paint_Color
+    ]
+
     return templates.TemplateResponse(
         "mechanic_pdi_form.html",
         {
@@ -145,22 +145,20 @@ async def pdi_work_form(
 
 
 @router.post("/pdi/complete")
-async def complete_pdi_work(
+def complete_pdi_work(
         request: Request,
         sale_id: int = Form(...),
         chassis_no: str = Form(...),
         engine_no: str = Form(None),
         dc_number: str = Form(None),
+        user: SessionUser = Depends(current_user),
         db: Session = Depends(get_db)
 ):
     """Complete PDI using existing service function"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    # Verify mechanic owns this task
-    mechanic_username = request.session.get("username")
-    sales_record = db.query(SalesRecord).filter(SalesRecord.id == sale_id).first()
+    # Verify mechanic owns this task (complete_pdi reuses this record from the identity map)
+    mechanic_username = user.username
+    sales_record = db.get(SalesRecord, sale_id)
 
     if not sales_record or sales_record.pdi_assigned_to != mechanic_username:
         return RedirectResponse(
@@ -178,6 +176,7 @@ async def complete_pdi_work(
     )
 
     if success:
+        clear_report_caches()
         return RedirectResponse(
             url=f"/mechanic/dashboard?success={message}",
             status_code=303
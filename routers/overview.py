@@ -1,29 +1,77 @@
 # routers/overview.py
-from fastapi import APIRouter, Request, Depends, Query, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Request, Depends, Query, Form, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse
+from sqlalchemy import case, func, literal, select, union_all
 from sqlalchemy.orm import Session
 from typing import Optional
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
+import time
 
 from database import get_db
 from services import branch_service, stock_service
 from models import VehicleMaster, SalesRecord, Branch
+from utils.templating import templates
+from utils.cache import counters_cache, counters_timestamp, COUNTERS_TTL
 
 router = APIRouter(prefix="/overview", tags=["overview"])
-templates = Jinja2Templates(directory="templates")
+
+# Shared auth/context helpers; the other routers import these rather than keep their own copies
+__all__ = [
+    "router",
+    "SessionUser",
+    "get_session_user",
+    "check_auth",
+    "get_active_context",
+    "get_greeting",
+    "get_context_data",
+    "current_user",
+    "current_context",
+    "managed_branch_ids",
+    "get_overview_counters",
+]
+
+# Shorter search terms match most of the table, so they're not worth a scan
+MIN_SEARCH_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class SessionUser:
+    """Logged-in user's session values, read once per request"""
+    logged_in: bool
+    username: Optional[str]
+    role: Optional[str]
+    branch_id: Optional[str]
+
+    @property
+    def is_owner(self) -> bool:
+        return self.branch_id is None
+
+
+def get_session_user(request: Request) -> SessionUser:
+    """Parse the session cookie values into a SessionUser (cached on request.state)"""
+    user = getattr(request.state, "user", None)
+    if user is None:
+        session = request.session
+        user = SessionUser(
+            logged_in=bool(session.get("logged_in")),
+            username=session.get("username"),
+            role=session.get("user_role"),
+            branch_id=session.get("branch_id")
+        )
+        request.state.user = user
+    return user
 
 
 def check_auth(request: Request):
     """Check if user is authenticated"""
-    if not request.session.get("logged_in"):
-        return False
-    return True
+    return get_session_user(request).logged_in
 
 
 def get_active_context(request: Request, db: Session):
     """Get the active branch context for the user"""
-    user_branch_id = request.session.get("branch_id")
+    user_branch_id = get_session_user(request).branch_id
 
     if user_branch_id:
         return user_branch_id
@@ -38,9 +86,8 @@ def get_active_context(request: Request, db: Session):
     return active_context
 
 
-def get_greeting():
-    """Get time-appropriate greeting"""
-    hour = datetime.now().hour
+@lru_cache(maxsize=24)
+def _greeting_for_hour(hour: int) -> str:
     if hour < 12:
         return "Good Morning"
     elif hour < 18:
@@ -49,43 +96,115 @@ def get_greeting():
         return "Good Evening"
 
 
+def get_greeting():
+    """Get time-appropriate greeting"""
+    return _greeting_for_hour(datetime.now().hour)
+
+
 def get_context_data(request: Request, db: Session):
-    """Get common context data for all views"""
-    original_branch_id = request.session.get("branch_id")
+    """Get common context data for all views (built once per request)"""
+    cached = getattr(request.state, "context", None)
+    if cached is not None:
+        return cached
+
+    user = get_session_user(request)
     active_branch_id = get_active_context(request, db)
-    active_branch = db.query(Branch).filter(Branch.Branch_ID == active_branch_id).first()
+    active_branch = db.get(Branch, active_branch_id) if active_branch_id else None
 
     context = {
-        "username": request.session.get("username"),
-        "user_role": request.session.get("user_role"),
+        "username": user.username,
+        "user_role": user.role,
         "branch_name": active_branch.Branch_Name if active_branch else "N/A",
-        "is_owner": original_branch_id is None,
+        "is_owner": user.is_owner,
         "active_context": active_branch_id,
         "greeting": get_greeting()
     }
 
-    if original_branch_id is None:
+    if user.is_owner:
         context["head_branches"] = branch_service.get_head_branches(db)
 
+    request.state.context = context
     return context
 
 
+def current_user(request: Request) -> SessionUser:
+    """Dependency: require login and return the parsed session"""
+    user = get_session_user(request)
+    if not user.logged_in:
+        raise HTTPException(status_code=307, headers={"Location": "/login"})
+    return user
+
+
+def current_context(
+        request: Request,
+        user: SessionUser = Depends(current_user),
+        db: Session = Depends(get_db)
+) -> dict:
+    """Dependency: require login and resolve the page context once per request"""
+    return get_context_data(request, db)
+
+
+def managed_branch_ids(
+        context: dict = Depends(current_context),
+        db: Session = Depends(get_db)
+) -> list:
+    """Dependency: IDs of the branches managed from the active context (cached in branch_service)"""
+    return branch_service.get_managed_branch_ids(db, context["active_context"])
+
+
+def get_overview_counters(db: Session, branch_ids: list) -> dict:
+    """Get dashboard counters for these branches with a short-lived cache"""
+    cache_key = tuple(sorted(branch_ids))
+    current_time = time.time()
+
+    if cache_key in counters_cache:
+        if current_time - counters_timestamp[cache_key] < COUNTERS_TTL:
+            return counters_cache[cache_key]
+
+    # One conditional-aggregate query per table
+    pdi_counts = db.query(
+        func.sum(case((SalesRecord.fulfillment_status == "PDI Pending", 1), else_=0)).label("pending"),
+        func.sum(case((SalesRecord.fulfillment_status == "PDI In Progress", 1), else_=0)).label("in_progress")
+    ).filter(
+        SalesRecord.Branch_ID.in_(branch_ids),
+        SalesRecord.fulfillment_status.in_(["PDI Pending", "PDI In Progress"])
+    ).one()
+
+    vehicle_counts = db.query(
+        func.sum(case((VehicleMaster.status == "In Transit", 1), else_=0)).label("in_transit"),
+        func.sum(case((VehicleMaster.status == "In Stock", 1), else_=0)).label("in_stock")
+    ).filter(
+        VehicleMaster.current_branch_id.in_(branch_ids),
+        VehicleMaster.status.in_(["In Transit", "In Stock"])
+    ).one()
+
+    counters = {
+        "pdi_pending": pdi_counts.pending or 0,
+        "pdi_in_progress": pdi_counts.in_progress or 0,
+        "in_transit": vehicle_counts.in_transit or 0,
+        "stock_on_hand": vehicle_counts.in_stock or 0
+    }
+
+    counters_cache[cache_key] = counters
+    counters_timestamp[cache_key] = current_time
+
+    return counters
+
+
 @router.post("/switch-context")
-async def switch_context(
+def switch_context(
         request: Request,
         branch_id: str = Form(...),
+        user: SessionUser = Depends(current_user),
         db: Session = Depends(get_db)
 ):
     """Switch owner's active branch context"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    if request.session.get("branch_id") is not None:
+    if not user.is_owner:
         return RedirectResponse(url="/overview")
 
     request.session["active_context"] = branch_id
-    branch = db.query(Branch).filter(Branch.Branch_ID == branch_id).first()
+    branch = db.get(Branch, branch_id)
     if branch:
         request.session["active_context_name"] = branch.Branch_Name
 
@@ -95,55 +214,29 @@ async def switch_context(
 
 
 @router.get("", response_class=HTMLResponse)
-async def overview_page(request: Request, db: Session = Depends(get_db)):
+def overview_page(
+        request: Request,
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
+        db: Session = Depends(get_db)
+):
     """Overview Dashboard - Main landing page"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
-
-    # Get statistics
-    pdi_pending = db.query(SalesRecord).filter(
-        SalesRecord.Branch_ID.in_(branch_ids),
-        SalesRecord.fulfillment_status == "PDI Pending"
-    ).count()
-
-    pdi_in_progress = db.query(SalesRecord).filter(
-        SalesRecord.Branch_ID.in_(branch_ids),
-        SalesRecord.fulfillment_status == "PDI In Progress"
-    ).count()
-
-    in_transit = db.query(VehicleMaster).filter(
-        VehicleMaster.current_branch_id.in_(branch_ids),
-        VehicleMaster.status == "In Transit"
-    ).count()
-
-    stock_on_hand = db.query(VehicleMaster).filter(
-        VehicleMaster.current_branch_id.in_(branch_ids),
-        VehicleMaster.status == "In Stock"
-    ).count()
+    counters = get_overview_counters(db, branch_ids)
 
     return templates.TemplateResponse(
         "overview.html",
         {
             "request": request,
             **context,
-            "pdi_pending": pdi_pending,
-            "pdi_in_progress": pdi_in_progress,
-            "in_transit": in_transit,
-            "stock_on_hand": stock_on_hand,
+            **counters,
             "current_page": "overview"
         }
     )
 
 
-@router.get("/search", response_class=JSONResponse)
-async def universal_search(
+@router.get("/search", response_class=ORJSONResponse)
+def universal_search(
         request: Request,
         query: str = Query(...),
         db: Session = Depends(get_db)
@@ -153,45 +246,62 @@ async def universal_search(
     if not check_auth(request):
         return {"error": "Unauthorized"}
 
-    active_branch_id = get_active_context(request, db)
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    search_term = query.strip().upper()
+    if len(search_term) < MIN_SEARCH_LENGTH:
+        return {"vehicles": [], "sales": []}
 
-    vehicles = db.query(VehicleMaster, Branch).join(
+    active_branch_id = get_active_context(request, db)
+    branch_ids = branch_service.get_managed_branch_ids(db, active_branch_id)
+
+    pattern = f"%{search_term}%"
+
+    # Vehicles and sales are matched in one UNION ALL round-trip,
+    # each side capped at 10 rows; plain Core rows, no ORM hydration
+    vehicle_matches = select(
+        literal("vehicle").label("kind"),
+        VehicleMaster.chassis_no.label("chassis_no"),
+        VehicleMaster.model.label("detail"),
+        Branch.Branch_Name.label("branch"),
+        VehicleMaster.status.label("status")
+    ).join(
         Branch, VehicleMaster.current_branch_id == Branch.Branch_ID
-    ).filter(
+    ).where(
         VehicleMaster.current_branch_id.in_(branch_ids),
-        (VehicleMaster.chassis_no.ilike(f"%{query}%")) |
-        (VehicleMaster.dc_number.ilike(f"%{query}%"))
-    ).limit(10).all()
-
-    sales = db.query(SalesRecord, VehicleMaster, Branch).join(
-        VehicleMaster, SalesRecord.Chassis_No == VehicleMaster.chassis_no
+        (VehicleMaster.chassis_no.ilike(pattern)) |
+        (VehicleMaster.dc_number.ilike(pattern))
+    ).limit(10).subquery()
+
+    sale_matches = select(
+        literal("sale").label("kind"),
+        SalesRecord.chassis_no.label("chassis_no"),
+        SalesRecord.Customer_Name.label("detail"),
+        Branch.Branch_Name.label("branch"),
+        SalesRecord.fulfillment_status.label("status")
     ).join(
         Branch, SalesRecord.Branch_ID == Branch.Branch_ID
-    ).filter(
+    ).where(
         SalesRecord.Branch_ID.in_(branch_ids),
-        (SalesRecord.Customer_Name.ilike(f"%{query}%")) |
-        (SalesRecord.Chassis_No.ilike(f"%{query}%"))
-    ).limit(10).all()
-
-    results = {
-        "vehicles": [
-            {
-                "chassis_no": v.chassis_no,
-                "model": v.model,
-                "branch": b.Branch_Name,
-                "status": v.status
-            } for v, b in vehicles
-        ],
-        "sales": [
-            {
-                "customer": s.Customer_Name,
-                "chassis_no": s.Chassis_No,
-                "branch": b.Branch_Name,
-                "pdi_status": s.fulfillment_status
-            } for s, v, b in sales
-        ]
-    }
+        (SalesRecord.Customer_Name.ilike(pattern)) |
+        (SalesRecord.chassis_no.ilike(pattern))
+    ).limit(10).subquery()
+
+    stmt = union_all(select(vehicle_matches), select(sale_matches))
+
+    results = {"vehicles": [], "sales": []}
+    for row in db.execute(stmt).mappings():
+        if row["kind"] == "vehicle":
+            results["vehicles"].append({
+                "chassis_no": row["chassis_no"],
+                "model": row["detail"],
+                "branch": row["branch"],
+                "status": row["status"]
+            })
+        else:
+            results["sales"].append({
+                "customer": row["detail"],
+                "chassis_no": row["chassis_no"],
+                "branch": row["branch"],
+                "pdi_status": row["status"]
+            })
 
     return results
@@ -1,21 +1,78 @@
 # routers/reports.py - Complete version with all reports
-import pandas as pd
 from fastapi import APIRouter, Request, Depends, Query
-from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, distinct,or_
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, StreamingResponse, ORJSONResponse, RedirectResponse, Response
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Date, DateTime, Integer, bindparam, func, and_, case, desc, distinct, literal, or_, select, union, union_all
 from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from operator import itemgetter
+import asyncio
+import hashlib
+import heapq
 import io
 import csv
+import time
 
-from database import get_db
+from database import get_db, SessionLocal
 from services import branch_service, report_service
 from models import VehicleMaster, SalesRecord, InventoryTransaction, Branch
-from routers.overview import get_active_context, get_context_data, check_auth
+from routers.overview import get_active_context, get_context_data, check_auth, current_context, managed_branch_ids
+from utils.templating import templates
+from utils.cache import (
+    dashboard_cache, dashboard_timestamp, DASHBOARD_TTL,
+    branch_stats_cache, branch_stats_timestamp, BRANCH_STATS_TTL,
+    receiving_sources_cache, receiving_sources_timestamp, RECEIVING_SOURCES_TTL
+)
 
 router = APIRouter(prefix="/reports", tags=["reports"])
-templates = Jinja2Templates(directory="templates")
+
+# Rows fetched per round-trip when streaming CSV exports
+CSV_STREAM_BATCH = 1000
+
+# Branch summary export; CRLF line endings match csv.writer's default
+BRANCH_CSV_HEADER = "Branch,Stock,PDI Pending,PDI In Progress,PDI Completed,Avg Time\r\n"
+BRANCH_CSV_ROW = "{0},{stock},{pdi_pending},{pdi_in_progress},{pdi_completed},{avg_time}h\r\n"
+
+# Vehicles listed per model on the model-wise report
+MODEL_DETAIL_LIMIT = 50
+
+# Vehicle rows listed on the in-transit report; load totals are aggregated in SQL
+IN_TRANSIT_DETAIL_LIMIT = 500
+IN_TRANSIT_PAGE_SIZE = 50
+IN_TRANSIT_LOAD_DETAIL_LIMIT = 50  # per load card
+
+# Vehicle rows listed for a tracked load; the count and status come from an aggregate
+LOAD_DETAIL_LIMIT = 500
+
+# Aging report buckets: (maximum age in days, bucket key); anything older is the overflow bucket
+AGE_BUCKETS = ((30, 'days_0_30'), (60, 'days_31_60'), (90, 'days_61_90'), (120, 'days_91_120'))
+AGE_BUCKET_OVERFLOW = 'days_120_plus'
+
+
+def stream_csv(statement, header: list, format_row, filename: str) -> StreamingResponse:
+    """Stream a SELECT as CSV, writing one batch of rows at a time"""
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        yield buffer.getvalue()
+
+        # The request's session is closed before the body is sent, so the export reads on its own
+        with SessionLocal() as stream_db:
+            result = stream_db.execute(statement.execution_options(yield_per=CSV_STREAM_BATCH))
+            for batch in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(format_row(row) for row in batch)
+                yield buffer.getvalue()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}_{datetime.now().strftime('%Y%m%d')}.csv"}
+    )
 
 
 @router.get("", response_class=HTMLResponse)
@@ -23,37 +80,28 @@ async def reports_dashboard(
         request: Request,
         from_date: str = Query(None),
         to_date: str = Query(None),
-        db: Session = Depends(get_db)
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids)
 ):
     """Reports Dashboard - Main landing page"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
     # Set default date range (last 30 days)
+    now = datetime.now()
     if not from_date:
-        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        from_date = (now - timedelta(days=30)).strftime("%Y-%m-%d")
     if not to_date:
-        to_date = datetime.now().strftime("%Y-%m-%d")
+        to_date = now.strftime("%Y-%m-%d")
 
     from_dt = datetime.strptime(from_date, "%Y-%m-%d")
     to_dt = datetime.strptime(to_date, "%Y-%m-%d")
 
-    # Get managed branches
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    metrics, branch_stats, recent_activities = await get_dashboard_aggregates(branch_ids, from_dt, to_dt)
 
-    # Calculate key metrics
-    metrics = calculate_key_metrics(db, branch_ids, from_dt, to_dt)
-
-    # Get branch stats
-    branch_stats = get_branch_statistics(db, branch_ids)
-
-    # Get recent activities
-    recent_activities = get_recent_activities(db, branch_ids, limit=10)
+    # Same cached aggregates for the same viewer: let the browser keep its copy
+    etag = dashboard_etag(branch_ids, from_dt, to_dt, context)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
 
     return templates.TemplateResponse(
         "reports.html",
@@ -66,198 +114,326 @@ async def reports_dashboard(
             "branch_stats": branch_stats,
             "recent_activities": recent_activities,
             "current_page": "reports"
-        }
+        },
+        headers=cache_headers
     )
 
 
+def _run_with_session(func, *args):
+    """Run a report helper on its own session (Sessions can't be shared across threads)"""
+    with SessionLocal() as session:
+        return func(session, *args)
+
+
+def _ranked(counts: Counter) -> list:
+    """(name, count) pairs, largest count first; ties by name"""
+    return sorted(counts.items(), key=lambda x: (-x[1], x[0]))
+
+
+def _dashboard_cache_key(branch_ids: list, from_dt: datetime, to_dt: datetime):
+    return tuple(sorted(branch_ids)), from_dt.date(), to_dt.date()
+
+
+async def get_dashboard_aggregates(branch_ids: list, from_dt: datetime, to_dt: datetime):
+    """Key metrics, branch stats and recent activity for the dashboard with a short-lived cache"""
+    cache_key = _dashboard_cache_key(branch_ids, from_dt, to_dt)
+    current_time = time.time()
+
+    if cache_key in dashboard_cache:
+        if current_time - dashboard_timestamp[cache_key] < DASHBOARD_TTL:
+            return dashboard_cache[cache_key]
+
+    # The three are independent, so their round-trips overlap on separate pooled connections
+    aggregates = tuple(await asyncio.gather(
+        run_in_threadpool(_run_with_session, calculate_key_metrics, branch_ids, from_dt, to_dt),
+        run_in_threadpool(_run_with_session, get_branch_statistics, branch_ids),
+        run_in_threadpool(_run_with_session, get_recent_activities, branch_ids, 10)
+    ))
+
+    dashboard_cache[cache_key] = aggregates
+    dashboard_timestamp[cache_key] = current_time
+
+    return aggregates
+
+
+def dashboard_etag(branch_ids: list, from_dt: datetime, to_dt: datetime, context: dict) -> str:
+    """Weak ETag for a dashboard page: changes when the cached aggregates are rebuilt or the viewer's context changes"""
+    cache_key = _dashboard_cache_key(branch_ids, from_dt, to_dt)
+    viewer = tuple(context.get(key) for key in ("username", "user_role", "branch_name", "active_context", "greeting"))
+    version = (cache_key, dashboard_timestamp.get(cache_key), viewer)
+    return 'W/"%s"' % hashlib.md5(repr(version).encode()).hexdigest()
+
+
+# Key metrics statement, built once; calls only supply the bound values
+_metric_branch_ids = bindparam("branch_ids", expanding=True)
+_metric_from_date = bindparam("from_date")
+_metric_to_date = bindparam("to_date")
+
+# Total PDI completed in period
+_total_pdi_completed = select(func.count()).select_from(SalesRecord).where(
+    SalesRecord.Branch_ID.in_(_metric_branch_ids),
+    SalesRecord.fulfillment_status == "PDI Completed",
+    SalesRecord.Timestamp.between(_metric_from_date, _metric_to_date)
+).scalar_subquery()
+
+# Inward rows in period per load (NULL loads form one group); a single scan gives
+# both the vehicle total and the number of distinct loads
+_inward_by_load = select(
+    InventoryTransaction.Load_Number,
+    func.count().label("vehicles")
+).where(
+    InventoryTransaction.Current_Branch_ID.in_(_metric_branch_ids),
+    InventoryTransaction.Transaction_Type == "INWARD",
+    InventoryTransaction.Date.between(_metric_from_date, _metric_to_date)
+).group_by(InventoryTransaction.Load_Number).subquery()
+
+# Current stock
+_current_stock = select(func.count()).select_from(VehicleMaster).where(
+    VehicleMaster.current_branch_id.in_(_metric_branch_ids),
+    VehicleMaster.status == "In Stock"
+).scalar_subquery()
+
+# All four counts in a single Core round-trip, no ORM row handling
+KEY_METRICS_STMT = select(
+    _total_pdi_completed.label("total_pdi_completed"),
+    func.coalesce(func.sum(_inward_by_load.c.vehicles), 0).label("vehicles_received"),
+    func.count(_inward_by_load.c.Load_Number).label("loads_received"),
+    _current_stock.label("current_stock")
+).select_from(_inward_by_load)
+
+
 def calculate_key_metrics(db: Session, branch_ids: list, from_dt: datetime, to_dt: datetime):
     """Calculate key performance metrics"""
 
-    # Total PDI completed in period
-    total_pdi_completed = db.query(SalesRecord).filter(
-        SalesRecord.Branch_ID.in_(branch_ids),
-        SalesRecord.fulfillment_status == "PDI Completed",
-        SalesRecord.Timestamp >= from_dt.date(),
-        SalesRecord.Timestamp <= to_dt.date()
-    ).count()
+    # No managed branches: everything is zero, no round-trip needed
+    counts = {"total_pdi_completed": 0, "vehicles_received": 0, "loads_received": 0, "current_stock": 0}
+    if branch_ids:
+        counts = db.execute(KEY_METRICS_STMT, {
+            "branch_ids": list(branch_ids),
+            "from_date": from_dt.date(),
+            "to_date": to_dt.date()
+        }).one()._asdict()
 
     # Average PDI time (in hours)
     avg_pdi_time = 24  # Placeholder
     target_pdi_time = 48
 
-    # Vehicles received in period
-    vehicles_received = db.query(InventoryTransaction).filter(
-        InventoryTransaction.Current_Branch_ID.in_(branch_ids),
-        InventoryTransaction.Transaction_Type == "INWARD",
-        InventoryTransaction.Date >= from_dt.date(),
-        InventoryTransaction.Date <= to_dt.date()
-    ).count()
-
-    # Count unique loads
-    loads_received = db.query(func.count(distinct(InventoryTransaction.Load_Number))).filter(
-        InventoryTransaction.Current_Branch_ID.in_(branch_ids),
-        InventoryTransaction.Transaction_Type == "INWARD",
-        InventoryTransaction.Date >= from_dt.date(),
-        InventoryTransaction.Date <= to_dt.date(),
-        InventoryTransaction.Load_Number.isnot(None)
-    ).scalar() or 0
-
-    # Current stock
-    current_stock = db.query(VehicleMaster).filter(
-        VehicleMaster.current_branch_id.in_(branch_ids),
-        VehicleMaster.status == "In Stock"
-    ).count()
-
     return {
-        "total_pdi_completed": total_pdi_completed,
+        "total_pdi_completed": counts["total_pdi_completed"],
         "pdi_completion_change": 15,  # Placeholder
         "avg_pdi_time": avg_pdi_time,
         "target_pdi_time": target_pdi_time,
-        "vehicles_received": vehicles_received,
-        "loads_received": loads_received,
-        "current_stock": current_stock,
+        "vehicles_received": counts["vehicles_received"],
+        "loads_received": counts["loads_received"] or 0,
+        "current_stock": counts["current_stock"],
         "branches_count": len(branch_ids)
     }
 
 
 def get_branch_statistics(db: Session, branch_ids: list):
-    """Get statistics for each branch"""
+    """Get statistics for each branch with a short-lived cache"""
+    if not branch_ids:
+        return []
 
-    stats = []
+    cache_key = tuple(branch_ids)
+    current_time = time.time()
 
-    for branch_id in branch_ids:
-        branch = db.query(Branch).filter(Branch.Branch_ID == branch_id).first()
-        if not branch:
-            continue
+    if cache_key in branch_stats_cache:
+        if current_time - branch_stats_timestamp[cache_key] < BRANCH_STATS_TTL:
+            return branch_stats_cache[cache_key]
 
-        stock = db.query(VehicleMaster).filter(
-            VehicleMaster.current_branch_id == branch_id,
-            VehicleMaster.status == "In Stock"
-        ).count()
-
-        pdi_pending = db.query(SalesRecord).filter(
-            SalesRecord.Branch_ID == branch_id,
-            SalesRecord.fulfillment_status == "PDI Pending"
-        ).count()
-
-        pdi_in_progress = db.query(SalesRecord).filter(
-            SalesRecord.Branch_ID == branch_id,
-            SalesRecord.fulfillment_status == "PDI In Progress"
-        ).count()
-
-        pdi_completed = db.query(SalesRecord).filter(
-            SalesRecord.Branch_ID == branch_id,
-            SalesRecord.fulfillment_status == "PDI Completed"
-        ).count()
-
-        stats.append({
-            "name": branch.Branch_Name,
-            "stock": stock,
-            "pdi_pending": pdi_pending,
-            "pdi_in_progress": pdi_in_progress,
-            "pdi_completed": pdi_completed,
+    branch_map = {
+        branch_id: name for branch_id, name in db.query(Branch.Branch_ID, Branch.Branch_Name).filter(
+            Branch.Branch_ID.in_(branch_ids)
+        )
+    }
+
+    # One grouped query per table instead of four counts per branch
+    stock_counts = dict(db.query(
+        VehicleMaster.current_branch_id,
+        func.count(VehicleMaster.chassis_no)
+    ).filter(
+        VehicleMaster.current_branch_id.in_(branch_ids),
+        VehicleMaster.status == "In Stock"
+    ).group_by(VehicleMaster.current_branch_id).all())
+
+    pdi_counts = {
+        row.Branch_ID: {
+            "pdi_pending": int(row.pending or 0),
+            "pdi_in_progress": int(row.in_progress or 0),
+            "pdi_completed": int(row.completed or 0)
+        } for row in db.query(
+            SalesRecord.Branch_ID,
+            func.sum(case((SalesRecord.fulfillment_status == "PDI Pending", 1), else_=0)).label("pending"),
+            func.sum(case((SalesRecord.fulfillment_status == "PDI In Progress", 1), else_=0)).label("in_progress"),
+            func.sum(case((SalesRecord.fulfillment_status == "PDI Completed", 1), else_=0)).label("completed")
+        ).filter(
+            SalesRecord.Branch_ID.in_(branch_ids),
+            SalesRecord.fulfillment_status.in_(["PDI Pending", "PDI In Progress", "PDI Completed"])
+        ).group_by(SalesRecord.Branch_ID)
+    }
+
+    # Branches without sales rows get zeroed PDI counts
+    no_pdi = {"pdi_pending": 0, "pdi_in_progress": 0, "pdi_completed": 0}
+    stats = [
+        {
+            "name": branch_map[branch_id],
+            "stock": stock_counts.get(branch_id, 0),
+            **pdi_counts.get(branch_id, no_pdi),
             "avg_time": 28
-        })
+        }
+        for branch_id in branch_ids if branch_id in branch_map
+    ]
+
+    branch_stats_cache[cache_key] = stats
+    branch_stats_timestamp[cache_key] = current_time
 
     return stats
 
 
 def get_recent_activities(db: Session, branch_ids: list, limit: int = 10):
     """Get recent activities across branches"""
-
-    activities = []
-
-    # Recent PDI completions
-    recent_pdi = db.query(SalesRecord, Branch).join(
+    if not branch_ids:
+        return []
+
+    # Latest PDI completions and stock receipts, five of each, in one UNION ALL round-trip;
+    # the timestamp columns stay separate so each keeps its own type
+    recent_pdi = select(
+        literal("pdi").label("kind"),
+        SalesRecord.Timestamp.label("completed_at"),
+        literal(None, type_=Date).label("received_on"),
+        SalesRecord.Customer_Name.label("name"),
+        SalesRecord.chassis_no.label("item"),
+        literal(None, type_=Integer).label("quantity"),
+        Branch.Branch_Name.label("branch")
+    ).join(
         Branch, SalesRecord.Branch_ID == Branch.Branch_ID
-    ).filter(
+    ).where(
         SalesRecord.Branch_ID.in_(branch_ids),
         SalesRecord.fulfillment_status == "PDI Completed"
-    ).order_by(SalesRecord.Timestamp.desc()).limit(5).all()
-
-    for sale, branch in recent_pdi:
-        activities.append({
-            "icon": "✅",
-            "color": "green",
-            "title": "PDI Completed",
-            "description": f"{sale.Customer_Name} - {sale.chassis_no}",
-            "time": sale.Timestamp.strftime("%d %b, %Y"),
-            "branch": branch.Branch_Name
-        })
-
-    # Recent stock receipts
-    recent_receipts = db.query(InventoryTransaction, Branch).join(
+    ).order_by(SalesRecord.Timestamp.desc()).limit(5).subquery()
+
+    recent_receipts = select(
+        literal("receipt").label("kind"),
+        literal(None, type_=DateTime).label("completed_at"),
+        InventoryTransaction.Date.label("received_on"),
+        InventoryTransaction.Model.label("name"),
+        InventoryTransaction.Variant.label("item"),
+        InventoryTransaction.Quantity.label("quantity"),
+        Branch.Branch_Name.label("branch")
+    ).join(
         Branch, InventoryTransaction.Current_Branch_ID == Branch.Branch_ID
-    ).filter(
+    ).where(
         InventoryTransaction.Current_Branch_ID.in_(branch_ids),
         InventoryTransaction.Transaction_Type == "INWARD"
-    ).order_by(InventoryTransaction.Date.desc()).limit(5).all()
-
-    for receipt, branch in recent_receipts:
-        activities.append({
-            "icon": "📦",
-            "color": "blue",
-            "title": "Stock Received",
-            "description": f"{receipt.Model} - {receipt.Variant} ({receipt.Quantity} units)",
-            "time": receipt.Date.strftime("%d %b %Y"),
-            "branch": branch.Branch_Name
-        })
+    ).order_by(InventoryTransaction.Date.desc()).limit(5).subquery()
 
-    return activities[:limit]
+    # PDI completions first, then receipts, newest first within each
+    stmt = union_all(select(recent_pdi), select(recent_receipts)).order_by(
+        "kind", desc("completed_at"), desc("received_on")
+    ).limit(limit)
+
+    activities = []
+    for row in db.execute(stmt):
+        if row.kind == "pdi":
+            activities.append({
+                "icon": "✅",
+                "color": "green",
+                "title": "PDI Completed",
+                "description": f"{row.name} - {row.item}",
+                "time": row.completed_at.strftime("%d %b, %Y"),
+                "branch": row.branch
+            })
+        else:
+            activities.append({
+                "icon": "📦",
+                "color": "blue",
+                "title": "Stock Received",
+                "description": f"{row.name} - {row.item} ({row.quantity} units)",
+                "time": row.received_on.strftime("%d %b %Y"),
+                "branch": row.branch
+            })
+
+    return activities
 
 
 # ==================== STOCK MOVEMENT REPORT (REDESIGNED) ====================
 @router.get("/stock-movement", response_class=HTMLResponse)
-async def stock_movement_report(
+def stock_movement_report(
         request: Request,
         from_date: str = Query(None),
         to_date: str = Query(None),
+        output_format: str = Query("html", alias="format"),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """Stock Movement Report - Branch Transfer Summary"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
+    now = datetime.now()
     if not from_date:
-        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        from_date = (now - timedelta(days=30)).strftime("%Y-%m-%d")
     if not to_date:
-        to_date = datetime.now().strftime("%Y-%m-%d")
+        to_date = now.strftime("%Y-%m-%d")
 
     from_dt = datetime.strptime(from_date, "%Y-%m-%d").date()
     to_dt = datetime.strptime(to_date, "%Y-%m-%d").date()
 
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    movement_filters = [
+        InventoryTransaction.Date.between(from_dt, to_dt),
+        or_(
+            InventoryTransaction.Current_Branch_ID.in_(branch_ids),
+            InventoryTransaction.From_Branch_ID.in_(branch_ids),
+            InventoryTransaction.To_Branch_ID.in_(branch_ids)
+        )
+    ]
 
-    # ===== SINGLE DB CALL: Fetch all transactions =====
+    # Raw rows, only for the CSV export; branch IDs are swapped for names (ID if the branch is unknown)
+    current_branch = aliased(Branch)
+    from_branch = aliased(Branch)
+    to_branch = aliased(Branch)
     query = db.query(
         InventoryTransaction.Date,
         InventoryTransaction.Transaction_Type,
-        InventoryTransaction.Current_Branch_ID,
-        InventoryTransaction.From_Branch_ID,
-        InventoryTransaction.To_Branch_ID,
+        func.coalesce(current_branch.Branch_Name, InventoryTransaction.Current_Branch_ID),
+        func.coalesce(from_branch.Branch_Name, InventoryTransaction.From_Branch_ID),
+        func.coalesce(to_branch.Branch_Name, InventoryTransaction.To_Branch_ID),
         InventoryTransaction.Model,
         InventoryTransaction.Variant,
         InventoryTransaction.Color,
         InventoryTransaction.Quantity,
         InventoryTransaction.Load_Number
-    ).filter(
-        InventoryTransaction.Date >= from_dt,
-        InventoryTransaction.Date <= to_dt,
-        or_(
-            InventoryTransaction.Current_Branch_ID.in_(branch_ids),
-            InventoryTransaction.From_Branch_ID.in_(branch_ids),
-            InventoryTransaction.To_Branch_ID.in_(branch_ids)
+    ).outerjoin(
+        current_branch, current_branch.Branch_ID == InventoryTransaction.Current_Branch_ID
+    ).outerjoin(
+        from_branch, from_branch.Branch_ID == InventoryTransaction.From_Branch_ID
+    ).outerjoin(
+        to_branch, to_branch.Branch_ID == InventoryTransaction.To_Branch_ID
+    ).filter(*movement_filters)
+
+    if output_format == "csv":
+        return stream_csv(
+            query.order_by(InventoryTransaction.Date).statement,
+            ['Date', 'Type', 'Branch', 'From Branch', 'To Branch', 'Model', 'Variant', 'Color', 'Quantity',
+             'Load Number'],
+            tuple,
+            "stock_movement"
         )
-    )
 
-    df = pd.read_sql(query.statement, db.get_bind())
+    outward_filters = movement_filters + [InventoryTransaction.Transaction_Type == "OUTWARD"]
+
+    # ===== SUMMARY METRICS (aggregated in SQL; only grouped rows leave the DB) =====
+    # No managed branches means no movements, so the queries are skipped entirely
+    totals = None
+    if branch_ids:
+        totals = db.query(
+            func.count().label("rows"),
+            func.sum(case((InventoryTransaction.Transaction_Type == "OUTWARD", InventoryTransaction.Quantity), else_=0)).label("sent"),
+            func.sum(case((InventoryTransaction.Transaction_Type == "INWARD", InventoryTransaction.Quantity), else_=0)).label("received"),
+            func.count(distinct(InventoryTransaction.Model)).label("models")
+        ).filter(*movement_filters).one()
 
-    if df.empty:
+    if totals is None or not totals.rows:
         return templates.TemplateResponse(
             "reports_stock_movement.html",
             {
@@ -273,145 +449,127 @@ async def stock_movement_report(
             }
         )
 
-    # Get all branches (including external ones)
-    all_branch_ids = set(df['Current_Branch_ID'].dropna()) | set(df['From_Branch_ID'].dropna()) | set(
-        df['To_Branch_ID'].dropna())
-    all_branches = db.query(Branch).filter(Branch.Branch_ID.in_(all_branch_ids)).all()
-    branch_map = {b.Branch_ID: b.Branch_Name for b in all_branches}
-
-    # Add branch names
-    df['Current_Branch_Name'] = df['Current_Branch_ID'].map(branch_map)
-    df['From_Branch_Name'] = df['From_Branch_ID'].map(branch_map)
-    df['To_Branch_Name'] = df['To_Branch_ID'].map(branch_map)
-
-    # Separate inward and outward
-    outward_df = df[df['Transaction_Type'] == 'OUTWARD'].copy()
-    inward_df = df[df['Transaction_Type'] == 'INWARD'].copy()
+    # Get all branches (including external ones) seen on either side of a movement
+    branch_columns = (
+        InventoryTransaction.Current_Branch_ID,
+        InventoryTransaction.From_Branch_ID,
+        InventoryTransaction.To_Branch_ID
+    )
+    all_branch_ids = {
+        branch_id for (branch_id,) in db.execute(union(*(
+            select(column).where(*movement_filters, column.isnot(None)) for column in branch_columns
+        )))
+    }
+    branch_map = dict(db.query(Branch.Branch_ID, Branch.Branch_Name).filter(Branch.Branch_ID.in_(all_branch_ids)).all())
 
-    # ===== SUMMARY METRICS =====
     summary = {
-        'total_sent': int(outward_df['Quantity'].sum()) if not outward_df.empty else 0,
-        'total_received': int(inward_df['Quantity'].sum()) if not inward_df.empty else 0,
+        'total_sent': int(totals.sent or 0),
+        'total_received': int(totals.received or 0),
         'unique_branches': len(all_branch_ids),
-        'unique_models': df['Model'].nunique()
+        'unique_models': totals.models
     }
 
-    # ===== BRANCH-TO-BRANCH TRANSFER SUMMARY =====
-    branch_transfers = []
-
-    if not outward_df.empty:
-        # For OUTWARD transactions:
-        # - Source = Current_Branch_ID (where the transfer originates)
-        # - Destination = To_Branch_ID (where it's going)
-
-        # Use Current_Branch as the "From" for outward transactions
-        outward_df['Source_Branch'] = outward_df['Current_Branch_Name']
-        outward_df['Dest_Branch'] = outward_df['To_Branch_Name']
-
-        # Group by Source → Destination
-        transfer_summary = outward_df.groupby(['Source_Branch', 'Dest_Branch']).agg({
-            'Quantity': 'sum',
-            'Load_Number': 'nunique',
-            'Model': lambda x: x.value_counts().to_dict()
-        }).reset_index()
-
-        for _, row in transfer_summary.iterrows():
-            source_branch = row['Source_Branch']
-            dest_branch = row['Dest_Branch']
-
-            # Skip if both are NaN
-            if pd.isna(source_branch) and pd.isna(dest_branch):
-                continue
-
-            total_qty = int(row['Quantity'])
-            loads = int(row['Load_Number'])
-            model_breakdown = row['Model']
-
-            # Format model breakdown
-            models_list = [
-                {'model': k, 'qty': int(v)}
-                for k, v in sorted(model_breakdown.items(), key=lambda x: x[1], reverse=True)
-            ]
-
-            branch_transfers.append({
-                'from_branch': source_branch if pd.notna(source_branch) else 'Unknown',
-                'to_branch': dest_branch if pd.notna(dest_branch) else 'Unknown',
-                'total_quantity': total_qty,
-                'loads': loads,
-                'models': models_list
-            })
+    # Outward movements rolled up to branch pair / model / variant; every section below reads these rows
+    outward_rows = db.query(
+        InventoryTransaction.Current_Branch_ID,
+        InventoryTransaction.From_Branch_ID,
+        InventoryTransaction.To_Branch_ID,
+        InventoryTransaction.Model,
+        InventoryTransaction.Variant,
+        func.count().label("transactions"),
+        func.sum(InventoryTransaction.Quantity).label("quantity")
+    ).filter(*outward_filters).group_by(
+        InventoryTransaction.Current_Branch_ID,
+        InventoryTransaction.From_Branch_ID,
+        InventoryTransaction.To_Branch_ID,
+        InventoryTransaction.Model,
+        InventoryTransaction.Variant
+    ).all()
 
-        # Sort by quantity descending
-        branch_transfers = sorted(branch_transfers, key=lambda x: x['total_quantity'], reverse=True)
+    # Distinct loads per source → destination (can't be summed from the finer groups)
+    pair_loads = Counter()
+    for row in db.query(
+        InventoryTransaction.Current_Branch_ID,
+        InventoryTransaction.To_Branch_ID,
+        func.count(distinct(InventoryTransaction.Load_Number)).label("loads")
+    ).filter(*outward_filters).group_by(
+        InventoryTransaction.Current_Branch_ID,
+        InventoryTransaction.To_Branch_ID
+    ):
+        pair_loads[(branch_map.get(row.Current_Branch_ID), branch_map.get(row.To_Branch_ID))] += row.loads
+
+    # For OUTWARD transactions the source is Current_Branch_ID and the destination To_Branch_ID;
+    # the matrix uses From_Branch_ID. Unnamed branches are left out, as pandas groupby did.
+    pair_quantity = Counter()
+    pair_models = defaultdict(Counter)
+    model_quantity = Counter()
+    model_destinations = defaultdict(Counter)
+    model_variants = defaultdict(Counter)
+    matrix = defaultdict(Counter)
+
+    for row in outward_rows:
+        quantity = int(row.quantity or 0)
+        source = branch_map.get(row.Current_Branch_ID)
+        from_branch = branch_map.get(row.From_Branch_ID)
+        dest = branch_map.get(row.To_Branch_ID)
+
+        if source is not None and dest is not None:
+            pair_quantity[(source, dest)] += quantity
+            pair_models[(source, dest)][row.Model] += row.transactions
+
+        model_quantity[row.Model] += quantity
+        if dest is not None:
+            model_destinations[row.Model][dest] += row.transactions
+        if row.Variant is not None:
+            model_variants[row.Model][row.Variant] += row.transactions
+
+        if from_branch is not None and dest is not None:
+            matrix[from_branch][dest] += quantity
 
-    # ===== MODEL-WISE TRANSFER SUMMARY =====
-    model_transfers = []
-
-    if not outward_df.empty:
-        # Group by Model and aggregate destinations
-        model_summary = outward_df.groupby('Model').agg({
-            'Quantity': 'sum',
-            'To_Branch_Name': lambda x: x.value_counts().to_dict(),
-            'Variant': lambda x: x.value_counts().to_dict()
-        }).reset_index()
-
-        for _, row in model_summary.iterrows():
-            model = row['Model']
-            total_qty = int(row['Quantity'])
-            destinations = row['To_Branch_Name']
-            variants = row['Variant']
-
-            # Top destinations
-            top_destinations = [
-                {'branch': k, 'qty': int(v)}
-                for k, v in sorted(destinations.items(), key=lambda x: x[1], reverse=True)[:3]
+    # ===== BRANCH-TO-BRANCH TRANSFER SUMMARY =====
+    # Sort by quantity descending (ties by branch names)
+    branch_transfers = [
+        {
+            'from_branch': source,
+            'to_branch': dest,
+            'total_quantity': pair_quantity[(source, dest)],
+            'loads': pair_loads[(source, dest)],
+            'models': [
+                {'model': k, 'qty': v}
+                for k, v in sorted(pair_models[(source, dest)].items(), key=lambda x: (-x[1], x[0]))
             ]
+        }
+        for source, dest in sorted(pair_quantity, key=lambda pair: (-pair_quantity[pair], pair))
+    ]
 
-            # Variant breakdown
-            variant_list = [
-                {'variant': k, 'qty': int(v)}
-                for k, v in sorted(variants.items(), key=lambda x: x[1], reverse=True)
+    # ===== MODEL-WISE TRANSFER SUMMARY =====
+    # Sort by quantity descending (ties by model name)
+    model_transfers = [
+        {
+            'model': model,
+            'total_quantity': model_quantity[model],
+            'destinations': [
+                {'branch': k, 'qty': v}
+                for k, v in heapq.nlargest(3, sorted(model_destinations[model].items()), key=itemgetter(1))
+            ],
+            'variants': [
+                {'variant': k, 'qty': v}
+                for k, v in sorted(model_variants[model].items(), key=lambda x: (-x[1], x[0]))
             ]
-
-            model_transfers.append({
-                'model': model,
-                'total_quantity': total_qty,
-                'destinations': top_destinations,
-                'variants': variant_list
-            })
-
-        # Sort by quantity descending
-        model_transfers = sorted(model_transfers, key=lambda x: x['total_quantity'], reverse=True)
+        }
+        for model in sorted(model_quantity, key=lambda m: (-model_quantity[m], m))
+    ]
 
     # ===== TRANSFER MATRIX (Source x Destination) =====
     transfer_matrix = []
-
-    if not outward_df.empty:
-        # Create pivot table: From Branch (rows) x To Branch (columns)
-        pivot = outward_df.pivot_table(
-            values='Quantity',
-            index='From_Branch_Name',
-            columns='To_Branch_Name',
-            aggfunc='sum',
-            fill_value=0
-        )
-
-        for from_branch in pivot.index:
-            row_data = {
-                'from_branch': from_branch if pd.notna(from_branch) else 'External',
-                'destinations': []
-            }
-
-            for to_branch in pivot.columns:
-                qty = int(pivot.loc[from_branch, to_branch])
-                if qty > 0:
-                    row_data['destinations'].append({
-                        'branch': to_branch if pd.notna(to_branch) else 'External',
-                        'quantity': qty
-                    })
-
-            if row_data['destinations']:
-                transfer_matrix.append(row_data)
+    for from_branch in sorted(matrix):
+        destinations = [
+            {'branch': to_branch, 'quantity': qty}
+            for to_branch, qty in sorted(matrix[from_branch].items())
+            if qty > 0
+        ]
+        if destinations:
+            transfer_matrix.append({'from_branch': from_branch, 'destinations': destinations})
 
     return templates.TemplateResponse(
         "reports_stock_movement.html",
@@ -431,28 +589,81 @@ async def stock_movement_report(
 
 # ==================== MODEL-WISE REPORT ====================
 @router.get("/model-wise", response_class=HTMLResponse)
-async def model_wise_report(
+def model_wise_report(
         request: Request,
         model: str = Query("all"),
+        output_format: str = Query("html", alias="format"),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """Model-wise Inventory Report"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
+    today = datetime.now().date()
 
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
+    if output_format == "csv":
+        statement = select(
+            VehicleMaster.chassis_no,
+            VehicleMaster.model,
+            VehicleMaster.variant,
+            VehicleMaster.color,
+            Branch.Branch_Name,
+            VehicleMaster.status,
+            VehicleMaster.date_received
+        ).join(
+            Branch, VehicleMaster.current_branch_id == Branch.Branch_ID
+        ).where(
+            VehicleMaster.current_branch_id.in_(branch_ids),
+            VehicleMaster.status == "In Stock"
+        ).order_by(VehicleMaster.model, VehicleMaster.variant)
+        if model != "all":
+            statement = statement.where(VehicleMaster.model == model)
+
+        return stream_csv(
+            statement,
+            ['Chassis No', 'Model', 'Variant', 'Color', 'Branch', 'Status', 'Age (Days)'],
+            lambda row: (*row[:6], (today - row.date_received.date()).days if row.date_received else 0),
+            "model_wise_stock"
+        )
 
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    branch_map = branch_service.get_managed_branch_names(db, context["active_context"])
 
-    # Get all available models
-    available_models = db.query(distinct(VehicleMaster.model)).filter(
+    stock_filters = [
         VehicleMaster.current_branch_id.in_(branch_ids),
         VehicleMaster.status == "In Stock"
-    ).order_by(VehicleMaster.model).all()
-    available_models = [m[0] for m in available_models if m[0]]
+    ]
+
+    # Unit counts per model/variant/colour/branch, grouped in SQL
+    stock_counts = db.query(
+        VehicleMaster.model,
+        VehicleMaster.variant,
+        VehicleMaster.color,
+        VehicleMaster.current_branch_id,
+        func.count().label("units")
+    ).filter(*stock_filters).group_by(
+        VehicleMaster.model,
+        VehicleMaster.variant,
+        VehicleMaster.color,
+        VehicleMaster.current_branch_id
+    ).all()
+
+    total_stock = 0
+    model_stats = defaultdict(lambda: {'units': 0, 'variant_counts': Counter(), 'color_counts': Counter()})
+    branch_counts = Counter()
+
+    for row in stock_counts:
+        total_stock += row.units
+
+        stats = model_stats[row.model]
+
+        stats['units'] += row.units
+        stats['variant_counts'][row.variant] += row.units
+        stats['color_counts'][row.color] += row.units
+
+        branch_counts[(row.model, row.variant, row.current_branch_id)] += row.units
+
+    # Get all available models
+    available_models = sorted(m for m in model_stats if m)
 
     # Query for models
     if model == "all":
@@ -460,56 +671,54 @@ async def model_wise_report(
     else:
         model_list = [model]
 
-    total_stock = db.query(VehicleMaster).filter(
-        VehicleMaster.current_branch_id.in_(branch_ids),
-        VehicleMaster.status == "In Stock"
-    ).count()
+    # First few vehicles of each listed model, capped per model in SQL
+    vehicles_by_model = defaultdict(list)
+    listed_models = [m for m in model_list if m in model_stats]
+    if listed_models:
+        ranked = select(
+            VehicleMaster.chassis_no,
+            VehicleMaster.model,
+            VehicleMaster.variant,
+            VehicleMaster.color,
+            VehicleMaster.current_branch_id,
+            VehicleMaster.status,
+            VehicleMaster.date_received,
+            func.row_number().over(
+                partition_by=VehicleMaster.model,
+                order_by=VehicleMaster.id
+            ).label("position")
+        ).where(*stock_filters, VehicleMaster.model.in_(listed_models)).subquery()
+
+        for v in db.execute(select(ranked).where(ranked.c.position <= MODEL_DETAIL_LIMIT)):
+            vehicles_by_model[v.model].append(v)
 
     models = []
     for model_name in model_list:
-        model_vehicles = db.query(VehicleMaster).filter(
-            VehicleMaster.model == model_name,
-            VehicleMaster.current_branch_id.in_(branch_ids),
-            VehicleMaster.status == "In Stock"
-        ).all()
+        stats = model_stats.get(model_name)
 
-        if not model_vehicles:
+        if not stats:
             continue
 
-        total_units = len(model_vehicles)
+        total_units = stats['units']
         percentage = round((total_units / total_stock * 100) if total_stock > 0 else 0, 1)
 
         # Get variants
-        variant_counts = {}
-        color_counts = {}
-
-        for v in model_vehicles:
-            variant_counts[v.variant] = variant_counts.get(v.variant, 0) + 1
-            color_counts[v.color] = color_counts.get(v.color, 0) + 1
+        variant_counts = stats['variant_counts']
+        color_counts = stats['color_counts']
 
         variants = []
-        for variant_name, count in sorted(variant_counts.items(), key=lambda x: x[1], reverse=True):
+        for variant_name, count in variant_counts.most_common():
             variant_percentage = round((count / total_units * 100), 1)
 
             # Branch-wise for this variant
-            branches = []
-            for branch_id in branch_ids:
-                branch = db.query(Branch).filter(Branch.Branch_ID == branch_id).first()
-                if not branch:
-                    continue
-
-                branch_count = db.query(VehicleMaster).filter(
-                    VehicleMaster.model == model_name,
-                    VehicleMaster.variant == variant_name,
-                    VehicleMaster.current_branch_id == branch_id,
-                    VehicleMaster.status == "In Stock"
-                ).count()
-
-                if branch_count > 0:
-                    branches.append({
-                        'name': branch.Branch_Name,
-                        'count': branch_count
-                    })
+            branches = [
+                {
+                    'name': branch_map[branch_id],
+                    'count': branch_counts[(model_name, variant_name, branch_id)]
+                }
+                for branch_id in branch_ids
+                if branch_id in branch_map and branch_counts[(model_name, variant_name, branch_id)] > 0
+            ]
 
             variants.append({
                 'name': variant_name,
@@ -520,7 +729,7 @@ async def model_wise_report(
 
         # Colors
         colors = []
-        for color_name, count in sorted(color_counts.items(), key=lambda x: x[1], reverse=True):
+        for color_name, count in color_counts.most_common():
             color_percentage = round((count / total_units * 100), 1)
             colors.append({
                 'name': color_name,
@@ -530,15 +739,14 @@ async def model_wise_report(
 
         # Vehicle details with age
         vehicles = []
-        for v in model_vehicles[:50]:  # Limit to 50 for performance
-            branch = db.query(Branch).filter(Branch.Branch_ID == v.current_branch_id).first()
-            age_days = (datetime.now().date() - v.date_received.date()).days if v.date_received else 0
+        for v in vehicles_by_model[model_name]:
+            age_days = (today - v.date_received.date()).days if v.date_received else 0
 
             vehicles.append({
                 'chassis_no': v.chassis_no,
                 'variant': v.variant,
                 'color': v.color,
-                'branch': branch.Branch_Name if branch else 'Unknown',
+                'branch': branch_map.get(v.current_branch_id, 'Unknown'),
                 'status': v.status,
                 'age_days': age_days
             })
@@ -567,91 +775,113 @@ async def model_wise_report(
 
 # ==================== AGING INVENTORY REPORT ====================
 @router.get("/aging-inventory", response_class=HTMLResponse)
-async def aging_inventory_report(
+def aging_inventory_report(
         request: Request,
+        output_format: str = Query("html", alias="format"),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """Aging Inventory Report"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
+    today = datetime.now().date()
 
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
+    if output_format == "csv":
+        # Oldest stock first, same as the on-screen table
+        statement = select(
+            VehicleMaster.chassis_no,
+            VehicleMaster.model,
+            VehicleMaster.variant,
+            VehicleMaster.color,
+            Branch.Branch_Name,
+            VehicleMaster.date_received
+        ).join(
+            Branch, VehicleMaster.current_branch_id == Branch.Branch_ID
+        ).where(
+            VehicleMaster.current_branch_id.in_(branch_ids),
+            VehicleMaster.status == "In Stock"
+        ).order_by(VehicleMaster.date_received)
 
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+        return stream_csv(
+            statement,
+            ['Chassis No', 'Model', 'Variant', 'Color', 'Branch', 'Age (Days)'],
+            lambda row: (*row[:5], (today - row.date_received.date()).days if row.date_received else 0),
+            "aging_inventory"
+        )
 
-    # Get all stock vehicles with age
-    vehicles = db.query(VehicleMaster, Branch).join(
-        Branch, VehicleMaster.current_branch_id == Branch.Branch_ID
-    ).filter(
+    in_stock = (
         VehicleMaster.current_branch_id.in_(branch_ids),
         VehicleMaster.status == "In Stock"
-    ).all()
+    )
 
-    # Age buckets
-    age_buckets = {
-        'days_0_30': 0,
-        'days_31_60': 0,
-        'days_61_90': 0,
-        'days_91_120': 0,
-        'days_120_plus': 0
-    }
+    # Vehicle counts per model per receiving day, bucketed by age in SQL.
+    # Average ages still need the day (date arithmetic differs between MySQL and SQLite).
+    # Undated vehicles count as age 0.
+    received_day = func.date(VehicleMaster.date_received, type_=Date)
+    bucket = case(
+        (received_day.is_(None), AGE_BUCKETS[0][1]),
+        *((received_day >= today - timedelta(days=max_age), key) for max_age, key in AGE_BUCKETS),
+        else_=AGE_BUCKET_OVERFLOW
+    )
+    age_rows = db.query(
+        VehicleMaster.model,
+        received_day.label("received_day"),
+        bucket.label("bucket"),
+        func.count(VehicleMaster.chassis_no).label("count")
+    ).filter(*in_stock).group_by(VehicleMaster.model, received_day, bucket).all()
+
+    age_buckets = dict.fromkeys([key for _, key in AGE_BUCKETS] + [AGE_BUCKET_OVERFLOW], 0)
+    model_age_totals = defaultdict(lambda: [0, 0])  # model -> [total age in days, vehicle count]
+    for row in age_rows:
+        age_buckets[row.bucket] += row.count
+        totals = model_age_totals[row.model]
+        totals[0] += ((today - row.received_day).days if row.received_day else 0) * row.count
+        totals[1] += row.count
 
-    all_stock = []
-    critical_stock = []
-    model_age_data = {}
-
-    for vehicle, branch in vehicles:
-        age_days = (datetime.now().date() - vehicle.date_received.date()).days if vehicle.date_received else 0
-
-        # Categorize
-        if age_days <= 30:
-            age_buckets['days_0_30'] += 1
-        elif age_days <= 60:
-            age_buckets['days_31_60'] += 1
-        elif age_days <= 90:
-            age_buckets['days_61_90'] += 1
-        elif age_days <= 120:
-            age_buckets['days_91_120'] += 1
-        else:
-            age_buckets['days_120_plus'] += 1
-            critical_stock.append({
+    # Calculate average age by model
+    model_ages = [
+        {
+            'name': model_name,
+            'avg_age': round(total_age / count) if count > 0 else 0,
+            'count': count
+        }
+        for model_name, (total_age, count) in model_age_totals.items()
+    ]
+
+    model_ages.sort(key=itemgetter('avg_age'), reverse=True)
+
+    def oldest_stock(*conditions, limit: int):
+        """Stock detail rows, oldest first (undated vehicles count as age 0, so they go last)"""
+        rows = db.query(
+            VehicleMaster.chassis_no,
+            VehicleMaster.model,
+            VehicleMaster.variant,
+            VehicleMaster.color,
+            VehicleMaster.date_received,
+            Branch.Branch_Name
+        ).join(
+            Branch, VehicleMaster.current_branch_id == Branch.Branch_ID
+        ).filter(*in_stock, *conditions).order_by(
+            VehicleMaster.date_received.is_(None),
+            VehicleMaster.date_received
+        ).limit(limit).all()
+
+        return [
+            {
                 'chassis_no': vehicle.chassis_no,
                 'model': vehicle.model,
                 'variant': vehicle.variant,
                 'color': vehicle.color,
-                'branch': branch.Branch_Name,
-                'age_days': age_days
-            })
-
-        all_stock.append({
-            'chassis_no': vehicle.chassis_no,
-            'model': vehicle.model,
-            'variant': vehicle.variant,
-            'color': vehicle.color,
-            'branch': branch.Branch_Name,
-            'age_days': age_days
-        })
-
-        # Track model ages
-        if vehicle.model not in model_age_data:
-            model_age_data[vehicle.model] = {'total_age': 0, 'count': 0}
-        model_age_data[vehicle.model]['total_age'] += age_days
-        model_age_data[vehicle.model]['count'] += 1
-
-    # Calculate average age by model
-    model_ages = []
-    for model_name, data in model_age_data.items():
-        avg_age = round(data['total_age'] / data['count']) if data['count'] > 0 else 0
-        model_ages.append({
-            'name': model_name,
-            'avg_age': avg_age,
-            'count': data['count']
-        })
+                'branch': vehicle.Branch_Name,
+                'age_days': (today - vehicle.date_received.date()).days if vehicle.date_received else 0
+            }
+            for vehicle in rows
+        ]
 
-    model_ages.sort(key=lambda x: x['avg_age'], reverse=True)
+    # Over 120 days old means received before the start of (today - 120 days)
+    critical_cutoff = datetime.combine(today - timedelta(days=120), datetime.min.time())
+    critical_stock = oldest_stock(VehicleMaster.date_received < critical_cutoff, limit=200)
+    all_stock = oldest_stock(limit=1000)
 
     return templates.TemplateResponse(
         "reports_aging_inventory.html",
@@ -660,8 +890,8 @@ async def aging_inventory_report(
             **context,
             "age_buckets": age_buckets,
             "model_ages": model_ages,
-            "critical_stock": sorted(critical_stock, key=lambda x: x['age_days'], reverse=True),
-            "all_stock": sorted(all_stock, key=lambda x: x['age_days'], reverse=True),
+            "critical_stock": critical_stock,
+            "all_stock": all_stock,
             "current_page": "reports"
         }
     )
@@ -669,37 +899,36 @@ async def aging_inventory_report(
 
 # ==================== TRANSFER REPORT ====================
 @router.get("/transfers", response_class=HTMLResponse)
-async def transfers_report(
+def transfers_report(
         request: Request,
         from_date: str = Query(None),
         to_date: str = Query(None),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """Transfer Report"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
+    now = datetime.now()
     if not from_date:
-        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        from_date = (now - timedelta(days=30)).strftime("%Y-%m-%d")
     if not to_date:
-        to_date = datetime.now().strftime("%Y-%m-%d")
+        to_date = now.strftime("%Y-%m-%d")
 
     from_dt = datetime.strptime(from_date, "%Y-%m-%d")
     to_dt = datetime.strptime(to_date, "%Y-%m-%d")
 
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
-
-    # Get outward transactions (transfers)
-    transfers_data = db.query(InventoryTransaction).filter(
+    # Get outward transactions (transfers); branch names are resolved afterwards in one lookup
+    transfers_data = db.query(
+        InventoryTransaction.Load_Number,
+        InventoryTransaction.Date,
+        InventoryTransaction.Quantity,
+        InventoryTransaction.From_Branch_ID,
+        InventoryTransaction.To_Branch_ID
+    ).filter(
         InventoryTransaction.Transaction_Type == "OUTWARD",
         InventoryTransaction.From_Branch_ID.in_(branch_ids),
-        InventoryTransaction.Date >= from_dt.date(),
-        InventoryTransaction.Date <= to_dt.date()
+        InventoryTransaction.Date.between(from_dt.date(), to_dt.date())
     ).order_by(InventoryTransaction.Date.desc()).all()
 
     # Group by load number
@@ -718,25 +947,41 @@ async def transfers_report(
             }
         load_groups[txn.Load_Number]['vehicle_count'] += txn.Quantity
 
+    # Transfer flows, tallied by branch ID pair
+    flow_counts = Counter()
+    for txn in transfers_data:
+        if txn.From_Branch_ID and txn.To_Branch_ID:
+            flow_counts[(txn.From_Branch_ID, txn.To_Branch_ID)] += txn.Quantity
+
+    # One lookup for every branch named on this page
+    named_branch_ids = {txn.From_Branch_ID for txn in transfers_data} | {txn.To_Branch_ID for txn in transfers_data}
+    named_branch_ids.discard(None)
+    branch_map = dict(db.query(Branch.Branch_ID, Branch.Branch_Name).filter(
+        Branch.Branch_ID.in_(named_branch_ids)
+    ).all()) if named_branch_ids else {}
+
+    # Received vehicles per load, counted for every load in one grouped query
+    received_counts = dict(db.query(
+        VehicleMaster.load_reference_number,
+        func.count(VehicleMaster.chassis_no)
+    ).filter(
+        VehicleMaster.load_reference_number.in_(list(load_groups)),
+        VehicleMaster.status == "In Stock"
+    ).group_by(VehicleMaster.load_reference_number).all()) if load_groups else {}
+
     # Format transfers
     transfers = []
     for load_data in load_groups.values():
-        from_branch = db.query(Branch).filter(Branch.Branch_ID == load_data['from_branch_id']).first()
-        to_branch = db.query(Branch).filter(Branch.Branch_ID == load_data['to_branch_id']).first()
-
         # Check if received
-        received_vehicles = db.query(VehicleMaster).filter(
-            VehicleMaster.load_reference_number == load_data['load_number'],
-            VehicleMaster.status == "In Stock"
-        ).count()
+        received_vehicles = received_counts.get(load_data['load_number'], 0)
 
         status = "Received" if received_vehicles >= load_data['vehicle_count'] else "In Transit"
 
         transfers.append({
             'date': load_data['date'].strftime("%d %b %Y"),
             'load_number': load_data['load_number'],
-            'from_branch': from_branch.Branch_Name if from_branch else 'Unknown',
-            'to_branch': to_branch.Branch_Name if to_branch else 'Unknown',
+            'from_branch': branch_map.get(load_data['from_branch_id'], 'Unknown'),
+            'to_branch': branch_map.get(load_data['to_branch_id'], 'Unknown'),
             'vehicle_count': load_data['vehicle_count'],
             'status': status
         })
@@ -753,27 +998,15 @@ async def transfers_report(
         'avg_transit_time': 3  # Placeholder
     }
 
-    # Transfer flows
-    transfer_flows = []
-    flow_map = {}
-
-    for txn in transfers_data:
-        if not txn.From_Branch_ID or not txn.To_Branch_ID:
-            continue
-
-        key = f"{txn.From_Branch_ID}-{txn.To_Branch_ID}"
-        if key not in flow_map:
-            from_branch = db.query(Branch).filter(Branch.Branch_ID == txn.From_Branch_ID).first()
-            to_branch = db.query(Branch).filter(Branch.Branch_ID == txn.To_Branch_ID).first()
-
-            flow_map[key] = {
-                'from_branch': from_branch.Branch_Name if from_branch else 'Unknown',
-                'to_branch': to_branch.Branch_Name if to_branch else 'Unknown',
-                'count': 0
-            }
-        flow_map[key]['count'] += txn.Quantity
-
-    transfer_flows = sorted(flow_map.values(), key=lambda x: x['count'], reverse=True)[:10]
+    # Transfer flows: top ten without sorting the rest, names resolved last
+    transfer_flows = [
+        {
+            'from_branch': branch_map.get(from_id, 'Unknown'),
+            'to_branch': branch_map.get(to_id, 'Unknown'),
+            'count': count
+        }
+        for (from_id, to_id), count in heapq.nlargest(10, flow_counts.items(), key=itemgetter(1))
+    ]
 
     return templates.TemplateResponse(
         "reports_transfers.html",
@@ -791,62 +1024,75 @@ async def transfers_report(
 
 
 # ==================== RECEIVING REPORT ====================
+def get_receiving_sources(db: Session, branch_ids: list):
+    """Distinct inward sources (remarks) for these branches with a short-lived cache"""
+    cache_key = tuple(sorted(branch_ids))
+    current_time = time.time()
+
+    if cache_key in receiving_sources_cache:
+        if current_time - receiving_sources_timestamp[cache_key] < RECEIVING_SOURCES_TTL:
+            return receiving_sources_cache[cache_key]
+
+    sources = db.query(distinct(InventoryTransaction.Remarks)).filter(
+        InventoryTransaction.Transaction_Type == "INWARD",
+        InventoryTransaction.Current_Branch_ID.in_(branch_ids)
+    ).all()
+    sources = [s[0] for s in sources if s[0]]
+
+    receiving_sources_cache[cache_key] = sources
+    receiving_sources_timestamp[cache_key] = current_time
+
+    return sources
+
+
 @router.get("/receiving", response_class=HTMLResponse)
-async def receiving_report(
+def receiving_report(
         request: Request,
         from_date: str = Query(None),
         to_date: str = Query(None),
         source: str = Query("all"),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """Receiving Report"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
+    now = datetime.now()
     if not from_date:
-        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        from_date = (now - timedelta(days=30)).strftime("%Y-%m-%d")
     if not to_date:
-        to_date = datetime.now().strftime("%Y-%m-%d")
+        to_date = now.strftime("%Y-%m-%d")
 
     from_dt = datetime.strptime(from_date, "%Y-%m-%d")
     to_dt = datetime.strptime(to_date, "%Y-%m-%d")
 
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
-
     # Get inward transactions
-    query = db.query(InventoryTransaction).filter(
+    receipt_filters = [
         InventoryTransaction.Transaction_Type == "INWARD",
         InventoryTransaction.Current_Branch_ID.in_(branch_ids),
-        InventoryTransaction.Date >= from_dt.date(),
-        InventoryTransaction.Date <= to_dt.date()
-    )
+        InventoryTransaction.Date.between(from_dt.date(), to_dt.date())
+    ]
 
     # Get all sources
-    sources = db.query(distinct(InventoryTransaction.Remarks)).filter(
-        InventoryTransaction.Transaction_Type == "INWARD",
-        InventoryTransaction.Current_Branch_ID.in_(branch_ids)
-    ).all()
-    sources = [s[0] for s in sources if s[0]]
+    sources = get_receiving_sources(db, branch_ids)
 
     if source != "all":
-        query = query.filter(InventoryTransaction.Remarks.contains(source))
-
-    receipts_data = query.order_by(InventoryTransaction.Date.desc()).all()
-
-    # Summary
-    total_received = sum(r.Quantity for r in receipts_data)
-    loads_received = len(set(r.Load_Number for r in receipts_data if r.Load_Number))
-
-    today = datetime.now().date()
-    today_received = sum(r.Quantity for r in receipts_data if r.Date == today)
+        receipt_filters.append(InventoryTransaction.Remarks.contains(source))
 
+    # Summary: every card in one conditional-aggregate query
+    today = now.date()
     week_start = today - timedelta(days=today.weekday())
-    week_received = sum(r.Quantity for r in receipts_data if r.Date >= week_start)
+    totals = db.query(
+        func.sum(InventoryTransaction.Quantity).label("total"),
+        func.sum(case((InventoryTransaction.Date == today, InventoryTransaction.Quantity), else_=0)).label("today"),
+        func.sum(case((InventoryTransaction.Date >= week_start, InventoryTransaction.Quantity), else_=0)).label("week"),
+        func.count(distinct(InventoryTransaction.Load_Number)).label("loads")
+    ).filter(*receipt_filters).one()
+
+    total_received = int(totals.total or 0)
+    loads_received = totals.loads or 0
+    today_received = int(totals.today or 0)
+    week_received = int(totals.week or 0)
 
     summary = {
         'total_received': total_received,
@@ -856,102 +1102,113 @@ async def receiving_report(
     }
 
     # Daily trend
-    daily_data = {}
-    for receipt in receipts_data:
-        date_str = receipt.Date.strftime("%d %b")
-        if date_str not in daily_data:
-            daily_data[date_str] = {'count': 0, 'loads': set()}
-        daily_data[date_str]['count'] += receipt.Quantity
-        if receipt.Load_Number:
-            daily_data[date_str]['loads'].add(receipt.Load_Number)
+    daily_rows = db.query(
+        InventoryTransaction.Date,
+        func.sum(InventoryTransaction.Quantity).label("vehicles"),
+        func.count(distinct(InventoryTransaction.Load_Number)).label("loads")
+    ).filter(*receipt_filters).group_by(
+        InventoryTransaction.Date
+    ).order_by(InventoryTransaction.Date.desc()).all()
 
-    max_count = max([d['count'] for d in daily_data.values()]) if daily_data else 1
+    max_count = max(int(d.vehicles or 0) for d in daily_rows) if daily_rows else 1
 
     daily_trend = []
-    for date_str, data in list(daily_data.items())[-14:]:  # Last 14 days
+    for day in daily_rows[-14:]:  # Last 14 days
+        count = int(day.vehicles or 0)
         daily_trend.append({
-            'date': date_str,
-            'count': data['count'],
-            'loads': len(data['loads']),
-            'percentage': round((data['count'] / max_count * 100))
+            'date': day.Date.strftime("%d %b"),
+            'count': count,
+            'loads': day.loads,
+            'percentage': round((count / max_count * 100))
         })
 
     # Source breakdown
-    source_data = {}
-    for receipt in receipts_data:
-        src = receipt.Remarks or 'Unknown'
-        if src not in source_data:
-            source_data[src] = {'vehicles': 0, 'loads': set()}
-        source_data[src]['vehicles'] += receipt.Quantity
-        if receipt.Load_Number:
-            source_data[src]['loads'].add(receipt.Load_Number)
+    source_rows = db.query(
+        InventoryTransaction.Remarks,
+        func.sum(InventoryTransaction.Quantity).label("vehicles"),
+        func.count(distinct(InventoryTransaction.Load_Number)).label("loads")
+    ).filter(*receipt_filters).group_by(InventoryTransaction.Remarks).all()
 
     source_breakdown = []
-    for src, data in source_data.items():
-        percentage = round((data['vehicles'] / total_received * 100) if total_received > 0 else 0, 1)
+    for row in source_rows:
+        vehicles = int(row.vehicles or 0)
+        percentage = round((vehicles / total_received * 100) if total_received > 0 else 0, 1)
         source_breakdown.append({
-            'name': src,
-            'vehicles': data['vehicles'],
-            'loads': len(data['loads']),
+            'name': row.Remarks or 'Unknown',
+            'vehicles': vehicles,
+            'loads': row.loads,
             'percentage': percentage
         })
 
-    source_breakdown.sort(key=lambda x: x['vehicles'], reverse=True)
+    source_breakdown.sort(key=itemgetter('vehicles'), reverse=True)
 
     # Model breakdown
-    model_data = {}
-    for receipt in receipts_data:
-        model = receipt.Model
-        if model not in model_data:
-            model_data[model] = {'count': 0, 'variants': {}, 'colors': {}}
-        model_data[model]['count'] += receipt.Quantity
-
-        variant = receipt.Variant
-        if variant:
-            model_data[model]['variants'][variant] = model_data[model]['variants'].get(variant, 0) + receipt.Quantity
+    # Rows come back with the biggest models first, so model_breakdown needs no sort
+    model_total = func.sum(func.sum(InventoryTransaction.Quantity)).over(
+        partition_by=InventoryTransaction.Model
+    )
+    model_rows = db.query(
+        InventoryTransaction.Model,
+        InventoryTransaction.Variant,
+        InventoryTransaction.Color,
+        func.sum(InventoryTransaction.Quantity).label("quantity")
+    ).filter(*receipt_filters).group_by(
+        InventoryTransaction.Model,
+        InventoryTransaction.Variant,
+        InventoryTransaction.Color
+    ).order_by(model_total.desc(), InventoryTransaction.Model).all()
 
-        color = receipt.Color
-        if color:
-            model_data[model]['colors'][color] = model_data[model]['colors'].get(color, 0) + receipt.Quantity
+    model_data = defaultdict(lambda: {
+        'count': 0, 'variants': Counter(), 'colors': Counter(),
+        'top_variant': 'N/A', 'top_variant_count': 0, 'top_color': 'N/A', 'top_color_count': 0
+    })
+    for row in model_rows:
+        quantity = int(row.quantity or 0)
+        data = model_data[row.Model]
+        data['count'] += quantity
+
+        # Keep the running leaders so no second scan is needed per model
+        if row.Variant:
+            data['variants'][row.Variant] += quantity
+            if data['variants'][row.Variant] > data['top_variant_count']:
+                data['top_variant'] = row.Variant
+                data['top_variant_count'] = data['variants'][row.Variant]
+        if row.Color:
+            data['colors'][row.Color] += quantity
+            if data['colors'][row.Color] > data['top_color_count']:
+                data['top_color'] = row.Color
+                data['top_color_count'] = data['colors'][row.Color]
 
     model_breakdown = []
     for model_name, data in model_data.items():
-        top_variant = max(data['variants'].items(), key=lambda x: x[1])[0] if data['variants'] else 'N/A'
-        top_color = max(data['colors'].items(), key=lambda x: x[1])[0] if data['colors'] else 'N/A'
         percentage = round((data['count'] / total_received * 100) if total_received > 0 else 0, 1)
 
         model_breakdown.append({
             'name': model_name,
             'count': data['count'],
             'percentage': percentage,
-            'top_variant': top_variant,
-            'top_color': top_color
+            'top_variant': data['top_variant'],
+            'top_color': data['top_color']
         })
 
-    model_breakdown.sort(key=lambda x: x['count'], reverse=True)
-
-    # Receipt details
-    receipts = []
-    for receipt in receipts_data[:100]:  # Limit to 100
-        # Try to get chassis from vehicles with this load
-        chassis_no = 'N/A'
-        if receipt.Load_Number:
-            vehicle = db.query(VehicleMaster).filter(
-                VehicleMaster.load_reference_number == receipt.Load_Number
-            ).first()
-            if vehicle:
-                chassis_no = vehicle.chassis_no
-
-        receipts.append({
-            'date': receipt.Date.strftime("%d %b %Y"),
-            'load_number': receipt.Load_Number or 'N/A',
-            'source': receipt.Remarks or 'Unknown',
-            'chassis_no': chassis_no,
-            'model': receipt.Model,
-            'variant': receipt.Variant,
-            'color': receipt.Color,
-            'received_by': None  # Placeholder
-        })
+    # Receipt details (only the rows the table shows)
+    receipts_data = db.query(
+        InventoryTransaction.Date,
+        InventoryTransaction.Load_Number,
+        InventoryTransaction.Remarks,
+        InventoryTransaction.Model,
+        InventoryTransaction.Variant,
+        InventoryTransaction.Color
+    ).filter(*receipt_filters).order_by(InventoryTransaction.Date.desc()).limit(100).all()
+
+    # One chassis per load, looked up for all listed loads at once
+    receipt_loads = {r.Load_Number for r in receipts_data if r.Load_Number}
+    load_chassis = dict(db.query(
+        VehicleMaster.load_reference_number,
+        func.min(VehicleMaster.chassis_no)
+    ).filter(
+        VehicleMaster.load_reference_number.in_(receipt_loads)
+    ).group_by(VehicleMaster.load_reference_number).all()) if receipt_loads else {}
 
     return templates.TemplateResponse(
         "reports_receiving.html",
@@ -966,7 +1223,8 @@ async def receiving_report(
             "daily_trend": daily_trend,
             "source_breakdown": source_breakdown,
             "model_breakdown": model_breakdown,
-            "receipts": receipts,
+            "receipts": receipts_data,
+            "load_chassis": load_chassis,
             "current_page": "reports"
         }
     )
@@ -974,55 +1232,94 @@ async def receiving_report(
 
 # ==================== IN-TRANSIT VEHICLES REPORT ====================
 @router.get("/in-transit", response_class=HTMLResponse)
-async def in_transit_report(
+def in_transit_report(
         request: Request,
+        page: int = Query(1, ge=1),
+        page_size: int = Query(IN_TRANSIT_PAGE_SIZE, ge=1, le=IN_TRANSIT_DETAIL_LIMIT),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """In-Transit Vehicles Report"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
+    # Loads dispatched from one of our branches (still in transit elsewhere)
+    outgoing_loads = db.query(InventoryTransaction.Load_Number).filter(
+        InventoryTransaction.From_Branch_ID.in_(branch_ids),
+        InventoryTransaction.Load_Number.isnot(None)
+    )
 
-    context = get_context_data(request, db)
+    now = datetime.now()
 
-    # Get all in-transit vehicles
-    vehicles = db.query(VehicleMaster).filter(
-        VehicleMaster.status == "In Transit"
-    ).all()
+    in_transit_filters = [
+        VehicleMaster.status == "In Transit",
+        or_(
+            VehicleMaster.current_branch_id.in_(branch_ids),
+            VehicleMaster.load_reference_number.in_(outgoing_loads)
+        )
+    ]
+
+    # Per-load counts and earliest dispatch date, grouped in SQL
+    load_rows = db.query(
+        VehicleMaster.load_reference_number,
+        func.count().label("vehicle_count"),
+        func.min(VehicleMaster.date_received).label("sent")
+    ).filter(*in_transit_filters).group_by(VehicleMaster.load_reference_number).all()
 
-    # Group by load
     load_groups = {}
-    for vehicle in vehicles:
-        load_num = vehicle.load_reference_number or 'UNKNOWN'
-        if load_num not in load_groups:
-            load_groups[load_num] = {
-                'load_number': load_num,
-                'destination': 'Unknown',  # Would need additional field
-                'vehicle_count': 0,
-                'vehicles': [],
-                'sent_date': vehicle.date_received.strftime("%d %b %Y") if vehicle.date_received else 'Unknown',
-                'days_in_transit': (datetime.now() - vehicle.date_received).days if vehicle.date_received else 0
-            }
+    total_in_transit = 0
+    delayed = 0
+    for row in load_rows:
+        load_num = row.load_reference_number or 'UNKNOWN'
+        days_in_transit = (now - row.sent).days if row.sent else 0
+        is_delayed = days_in_transit > 7
+        total_in_transit += row.vehicle_count
+        delayed += is_delayed
+        load_groups[load_num] = {
+            'load_number': load_num,
+            'destination': 'Unknown',  # Would need additional field
+            'vehicle_count': row.vehicle_count,
+            'vehicles': [],
+            'sent_date': row.sent.strftime("%d %b %Y") if row.sent else 'Unknown',
+            'days_in_transit': days_in_transit,
+            'is_delayed': is_delayed
+        }
+
+    # Vehicle details, capped per load so every card lists some of its vehicles
+    ranked = select(
+        VehicleMaster.chassis_no,
+        VehicleMaster.model,
+        VehicleMaster.variant,
+        VehicleMaster.color,
+        VehicleMaster.load_reference_number,
+        func.row_number().over(
+            partition_by=VehicleMaster.load_reference_number,
+            order_by=(VehicleMaster.date_received, VehicleMaster.chassis_no)
+        ).label("position")
+    ).where(*in_transit_filters).subquery()
+
+    vehicles = db.execute(
+        select(ranked).where(ranked.c.position <= IN_TRANSIT_LOAD_DETAIL_LIMIT).order_by(
+            ranked.c.load_reference_number, ranked.c.position
+        )
+    ).all()
 
-        load_groups[load_num]['vehicle_count'] += 1
-        load_groups[load_num]['vehicles'].append({
+    for vehicle in vehicles:
+        # Skip vehicles that went in transit after the aggregate ran; the next refresh includes them
+        group = load_groups.get(vehicle.load_reference_number or 'UNKNOWN')
+        if group is None:
+            continue
+        group['vehicles'].append({
             'chassis_no': vehicle.chassis_no,
             'model': vehicle.model,
             'variant': vehicle.variant,
             'color': vehicle.color
         })
 
-    # Calculate is_delayed
-    for load_data in load_groups.values():
-        load_data['is_delayed'] = load_data['days_in_transit'] > 7
-
-    loads = sorted(load_groups.values(), key=lambda x: x['days_in_transit'], reverse=True)
+    loads = sorted(load_groups.values(), key=itemgetter('days_in_transit'), reverse=True)
 
     # Summary
-    total_in_transit = len(vehicles)
     active_loads = len(load_groups)
-    on_time = sum(1 for l in loads if not l['is_delayed'])
-    delayed = sum(1 for l in loads if l['is_delayed'])
+    on_time = active_loads - delayed
 
     summary = {
         'total_in_transit': total_in_transit,
@@ -1031,18 +1328,31 @@ async def in_transit_report(
         'delayed': delayed
     }
 
-    # All vehicles
-    all_vehicles = []
-    for vehicle in vehicles:
-        all_vehicles.append({
+    # One page of the vehicle table, fetched one row past the page to detect a next page
+    page_rows = db.query(
+        VehicleMaster.chassis_no,
+        VehicleMaster.model,
+        VehicleMaster.current_branch_id,
+        VehicleMaster.load_reference_number,
+        VehicleMaster.date_received
+    ).filter(*in_transit_filters).order_by(
+        VehicleMaster.date_received,
+        VehicleMaster.chassis_no
+    ).offset((page - 1) * page_size).limit(page_size + 1).all()
+    has_next = len(page_rows) > page_size
+
+    all_vehicles = [
+        {
             'chassis_no': vehicle.chassis_no,
             'model': vehicle.model,
             'from_branch': vehicle.current_branch_id or 'Unknown',
             'to_branch': 'Unknown',
             'load_number': vehicle.load_reference_number or 'N/A',
             'sent_date': vehicle.date_received.strftime("%d %b") if vehicle.date_received else 'N/A',
-            'days_in_transit': (datetime.now() - vehicle.date_received).days if vehicle.date_received else 0
-        })
+            'days_in_transit': (now - vehicle.date_received).days if vehicle.date_received else 0
+        }
+        for vehicle in page_rows[:page_size]
+    ]
 
     return templates.TemplateResponse(
         "reports_in_transit.html",
@@ -1052,6 +1362,9 @@ async def in_transit_report(
             "summary": summary,
             "loads": loads,
             "all_vehicles": all_vehicles,
+            "page": page,
+            "page_size": page_size,
+            "has_next": has_next,
             "current_page": "reports"
         }
     )
@@ -1059,38 +1372,50 @@ async def in_transit_report(
 
 # ==================== LOAD TRACKING REPORT ====================
 @router.get("/load-tracking", response_class=HTMLResponse)
-async def load_tracking_report(
+def load_tracking_report(
         request: Request,
         load_number: str = Query(None),
+        context: dict = Depends(current_context),
         db: Session = Depends(get_db)
 ):
     """Load Tracking Report"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-
     load_data = None
 
     if load_number:
-        # Get vehicles for this load
-        vehicles = db.query(VehicleMaster).filter(
+        # Size and delivery state of the load, computed in SQL
+        load_counts = db.query(
+            func.count().label("total"),
+            func.sum(case((VehicleMaster.status == "In Stock", 1), else_=0)).label("in_stock")
+        ).filter(
+            VehicleMaster.load_reference_number == load_number
+        ).one()
+
+        # Get vehicles for this load (only the columns the page shows)
+        vehicles = db.query(
+            VehicleMaster.chassis_no,
+            VehicleMaster.model,
+            VehicleMaster.variant,
+            VehicleMaster.color,
+            VehicleMaster.status,
+            VehicleMaster.current_branch_id,
+            VehicleMaster.date_received
+        ).filter(
             VehicleMaster.load_reference_number == load_number
-        ).all()
+        ).order_by(VehicleMaster.id).limit(LOAD_DETAIL_LIMIT).all() if load_counts.total else []
 
         if vehicles:
             first_vehicle = vehicles[0]
 
             # Determine status
-            all_received = all(v.status == "In Stock" for v in vehicles)
+            all_received = load_counts.total == load_counts.in_stock
             status = "Delivered" if all_received else "In Transit"
 
             # Build timeline
             timeline = [
                 {
                     'title': 'Load Created',
-                    'description': f'Load {load_number} created with {len(vehicles)} vehicles',
+                    'description': f'Load {load_number} created with {load_counts.total} vehicles',
                     'timestamp': first_vehicle.date_received.strftime(
                         "%d %b %Y, %I:%M %p") if first_vehicle.date_received else None,
                     'location': first_vehicle.current_branch_id,
@@ -1117,38 +1442,41 @@ async def load_tracking_report(
                 'from_branch': first_vehicle.current_branch_id or 'Unknown',
                 'to_branch': 'Destination',  # Would need additional field
                 'sent_date': first_vehicle.date_received.strftime("%d %b %Y") if first_vehicle.date_received else 'Unknown',
-                'vehicle_count': len(vehicles),
+                'vehicle_count': load_counts.total,
                 'status': status,
                 'timeline': timeline,
-                'vehicles': [{
-                    'chassis_no': v.chassis_no,
-                    'model': v.model,
-                    'variant': v.variant,
-                    'color': v.color,
-                    'status': v.status
-                } for v in vehicles]
+                'vehicles': vehicles
             }
 
-    # Recent loads
-    recent_vehicles = db.query(VehicleMaster).filter(
-        VehicleMaster.load_reference_number.isnot(None)
-    ).order_by(VehicleMaster.date_received.desc()).limit(100).all()
-
-    recent_load_map = {}
-    for v in recent_vehicles:
-        load_num = v.load_reference_number
-        if load_num not in recent_load_map:
-            recent_load_map[load_num] = {
-                'load_number': load_num,
-                'from_branch': v.current_branch_id or 'Unknown',
-                'to_branch': 'Destination',
-                'vehicle_count': 0,
-                'date': v.date_received.strftime("%d %b %Y") if v.date_received else 'Unknown',
-                'status': 'In Transit'
-            }
-        recent_load_map[load_num]['vehicle_count'] += 1
+    # Ten most recent loads, limited in SQL; each load's latest vehicle gives its date and branch
+    ranked_loads = select(
+        VehicleMaster.load_reference_number,
+        VehicleMaster.current_branch_id,
+        VehicleMaster.date_received.label("last_received"),
+        func.count().over(partition_by=VehicleMaster.load_reference_number).label("vehicle_count"),
+        func.row_number().over(
+            partition_by=VehicleMaster.load_reference_number,
+            order_by=(VehicleMaster.date_received.desc(), VehicleMaster.id.desc())
+        ).label("position")
+    ).where(VehicleMaster.load_reference_number.isnot(None)).subquery()
+
+    recent_load_rows = db.execute(
+        select(ranked_loads).where(ranked_loads.c.position == 1).order_by(
+            ranked_loads.c.last_received.desc()
+        ).limit(10)
+    ).all()
 
-    recent_loads = list(recent_load_map.values())[:10]
+    recent_loads = [
+        {
+            'load_number': row.load_reference_number,
+            'from_branch': row.current_branch_id or 'Unknown',
+            'to_branch': 'Destination',
+            'vehicle_count': row.vehicle_count,
+            'date': row.last_received.strftime("%d %b %Y") if row.last_received else 'Unknown',
+            'status': 'In Transit'
+        }
+        for row in recent_load_rows
+    ]
 
     return templates.TemplateResponse(
         "reports_load_tracking.html",
@@ -1164,9 +1492,9 @@ async def load_tracking_report(
 
 
 @router.get("/export")
-async def export_report(
+def export_report(
         request: Request,
-        format: str = Query("csv"),
+        output_format: str = Query("csv", alias="format"),
         from_date: str = Query(None),
         to_date: str = Query(None),
         db: Session = Depends(get_db)
@@ -1174,44 +1502,36 @@ async def export_report(
     """Export reports in various formats"""
 
     if not check_auth(request):
-        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+        return ORJSONResponse({"error": "Unauthorized"}, status_code=401)
 
     active_branch_id = get_active_context(request, db)
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
+    branch_ids = branch_service.get_managed_branch_ids(db, active_branch_id)
 
     # Get branch stats
     branch_stats = get_branch_statistics(db, branch_ids)
 
-    if format == "csv":
-        # Generate CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        writer.writerow(['Branch', 'Stock', 'PDI Pending', 'PDI In Progress', 'PDI Completed', 'Avg Time'])
-        for stat in branch_stats:
-            writer.writerow([
-                stat['name'],
-                stat['stock'],
-                stat['pdi_pending'],
-                stat['pdi_in_progress'],
-                stat['pdi_completed'],
-                f"{stat['avg_time']}h"
-            ])
-
-        output.seek(0)
+    if output_format == "csv":
+        # Fixed numeric columns, so rows are plain string formatting; only the name may need quoting
+        def generate():
+            yield BRANCH_CSV_HEADER
+            for stat in branch_stats:
+                name = stat['name']
+                if any(ch in name for ch in ',"\r\n'):
+                    name = '"' + name.replace('"', '""') + '"'
+                yield BRANCH_CSV_ROW.format(name, **stat)
+
         return StreamingResponse(
-            iter([output.getvalue()]),
+            generate(),
             media_type="text/csv",
             headers={
                 "Content-Disposition": f"attachment; filename=branch_report_{datetime.now().strftime('%Y%m%d')}.csv"}
         )
 
-    return JSONResponse({"error": "Format not supported yet"}, status_code=400)
+    return ORJSONResponse({"error": "Format not supported yet"}, status_code=400)
 
 
 @router.get("/daily-sales-transfers", response_class=HTMLResponse)
-async def daily_sales_transfers(
+def daily_sales_transfers(
         request: Request,
         start_date: str = Query(None),
         end_date: str = Query(None),
@@ -1242,7 +1562,7 @@ async def daily_sales_transfers(
 
     # Build head_map
     head_map = {}
-    active_branch_obj = db.query(Branch).filter(Branch.Branch_ID == active_branch_id).first()
+    active_branch_obj = db.get(Branch, active_branch_id) if active_branch_id else None
     is_head_branch = any(hb.Branch_ID == active_branch_id for hb in head_branches)
 
     if is_head_branch:
@@ -1250,16 +1570,14 @@ async def daily_sales_transfers(
         print(f"[REPORT] User is at HEAD branch: {active_branch_obj.Branch_Name}")
     else:
         from models import BranchHierarchy
-        parent = db.query(BranchHierarchy).filter(
-            BranchHierarchy.Sub_Branch_ID == active_branch_id
-        ).first()
+        parent = db.get(BranchHierarchy, active_branch_id) if active_branch_id else None
 
         if parent:
-            parent_branch = db.query(Branch).filter(Branch.Branch_ID == parent.Parent_Branch_ID).first()
+            parent_branch = db.get(Branch, parent.Parent_Branch_ID)
             if parent_branch:
                 head_map[parent_branch.Branch_Name] = parent.Parent_Branch_ID
                 print(f"[REPORT] User at sub-branch, parent HEAD: {parent_branch.Branch_Name}")
-        else:
+        elif active_branch_obj:
             head_map[active_branch_obj.Branch_Name] = active_branch_id
             print(f"[REPORT] No parent found, using active branch: {active_branch_obj.Branch_Name}")
 
@@ -1274,8 +1592,7 @@ async def daily_sales_transfers(
     sales_data = {}
 
     for head_name, head_id in head_map.items():
-        managed_branches = branch_service.get_managed_branches(db, str(head_id))
-        branch_names = [b.Branch_Name for b in managed_branches]
+        branch_names = list(branch_service.get_managed_branch_names(db, str(head_id)).values())
 
         print(f"[REPORT] {head_name} manages {len(branch_names)} branches: {branch_names}")
 
@@ -1353,7 +1670,7 @@ async def daily_sales_transfers(
 
 
 @router.get("/debug-sales-data")
-async def debug_sales_data(
+def debug_sales_data(
         request: Request,
         start_date: str = Query(None),
         end_date: str = Query(None),
@@ -1362,7 +1679,7 @@ async def debug_sales_data(
     """Debug endpoint to check raw sales data"""
 
     if not check_auth(request):
-        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+        return ORJSONResponse({"error": "Unauthorized"}, status_code=401)
 
     if not start_date or not end_date:
         end_d = datetime.now().date()
@@ -1382,8 +1699,7 @@ async def debug_sales_data(
         func.count(InventoryTransaction.id).label('count'),
         func.sum(InventoryTransaction.Quantity).label('total_qty')
     ).filter(
-        InventoryTransaction.Date >= start_d,
-        InventoryTransaction.Date <= end_d
+        InventoryTransaction.Date.between(start_d, end_d)
     ).group_by(
         InventoryTransaction.Transaction_Type
     ).all()
@@ -1395,7 +1711,7 @@ async def debug_sales_data(
         func.count(InventoryTransaction.id).label('total_count')
     ).first()
 
-    return JSONResponse({
+    return ORJSONResponse({
         "requested_date_range": f"{start_d} to {end_d}",
         "database_date_range": {
             "min_date": str(date_range_check.min_date) if date_range_check.min_date else None,
@@ -1416,40 +1732,35 @@ async def debug_sales_data(
 
 # ==================== STOCK SUMMARY REPORT (OPTIMIZED WITH MODEL-VARIANT) ====================
 @router.get("/stock-summary", response_class=HTMLResponse)
-async def stock_summary_report(
+def stock_summary_report(
         request: Request,
+        context: dict = Depends(current_context),
         db: Session = Depends(get_db)
 ):
     """Current Stock Summary Report - Optimized with Model-Variant Breakdown"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
-
-    # Create branch mapping (already loaded, no extra query)
-    branch_map = {b.Branch_ID: b.Branch_Name for b in managed_branches}
+    # Managed branches with their names (cached, no extra query)
+    branch_map = branch_service.get_managed_branch_names(db, context["active_context"])
+    branch_ids = list(branch_map)
 
-    # ===== SINGLE DB CALL: Fetch all vehicles at once =====
-    query = db.query(
+    # ===== SINGLE DB CALL: vehicle counts per branch / model / variant / color =====
+    stock_rows = db.query(
         VehicleMaster.current_branch_id,
         VehicleMaster.model,
         VehicleMaster.variant,
         VehicleMaster.color,
-        VehicleMaster.chassis_no
+        func.count(VehicleMaster.chassis_no).label("count")
     ).filter(
         VehicleMaster.current_branch_id.in_(branch_ids),
         VehicleMaster.status == "In Stock"
-    )
-
-    # Load into DataFrame (single DB call)
-    df = pd.read_sql(query.statement, db.get_bind())
+    ).group_by(
+        VehicleMaster.current_branch_id,
+        VehicleMaster.model,
+        VehicleMaster.variant,
+        VehicleMaster.color
+    ).all()
 
-    if df.empty:
+    if not stock_rows:
         return templates.TemplateResponse(
             "reports_stock_summary.html",
             {
@@ -1465,82 +1776,70 @@ async def stock_summary_report(
             }
         )
 
-    # Add branch names
-    df['branch_name'] = df['current_branch_id'].map(branch_map)
+    # Grouped rows are few, so every breakdown is tallied in one pass; no DataFrame needed.
+    # Vehicles missing a model/variant/color still count towards the totals above that level.
+    total_stock = 0
+    branch_totals = Counter()
+    branch_models = defaultdict(Counter)
+    model_counts = Counter()
+    color_counts = Counter()
+    variant_counts = Counter()
+    model_variants = defaultdict(Counter)
+    model_colors = defaultdict(Counter)
+    model_branches = defaultdict(Counter)
+
+    for row in stock_rows:
+        count = row.count
+        branch_name = branch_map[row.current_branch_id]
+        total_stock += count
+        branch_totals[branch_name] += count
+        if row.variant is not None:
+            variant_counts[row.variant] += count
+        if row.color is not None:
+            color_counts[row.color] += count
+        if row.model is None:
+            continue
 
-    total_stock = len(df)
+        branch_models[branch_name][row.model] += count
+        model_counts[row.model] += count
+        model_branches[row.model][branch_name] += count
+        if row.variant is not None:
+            model_variants[row.model][row.variant] += count
+        if row.color is not None:
+            model_colors[row.model][row.color] += count
 
     # ===== BRANCH-WISE SUMMARY (in-memory) =====
-    branch_stock = []
-
-    branch_grouped = df.groupby('branch_name')
-    for branch_name, branch_df in branch_grouped:
-        # Model counts for this branch
-        model_counts = branch_df['model'].value_counts().to_dict()
-
-        branch_stock.append({
+    branch_stock = [
+        {
             'name': branch_name,
-            'total': len(branch_df),
+            'total': total,
             'models': [
-                {'name': k, 'count': int(v)}
-                for k, v in sorted(model_counts.items(), key=lambda x: x[1], reverse=True)
+                {'name': k, 'count': v}
+                for k, v in _ranked(branch_models[branch_name])
             ]
-        })
-
-    # Sort by total stock descending
-    branch_stock = sorted(branch_stock, key=lambda x: x['total'], reverse=True)
-
-    # ===== OVERALL MODEL SUMMARY (in-memory) =====
-    model_counts = df['model'].value_counts().to_dict()
-    models = [
-        {
-            'name': k,
-            'count': int(v),
-            'percentage': round((v / total_stock * 100), 1)
         }
-        for k, v in model_counts.items()
+        for branch_name, total in sorted(branch_totals.items())
     ]
-    models = sorted(models, key=lambda x: x['count'], reverse=True)
 
-    # ===== COLOR SUMMARY (in-memory) =====
-    color_counts = df['color'].value_counts().to_dict()
-    colors = [
-        {
-            'name': k,
-            'count': int(v),
-            'percentage': round((v / total_stock * 100), 1)
-        }
-        for k, v in color_counts.items()
-    ]
-    colors = sorted(colors, key=lambda x: x['count'], reverse=True)
+    # Sort by total stock descending
+    branch_stock = sorted(branch_stock, key=itemgetter('total'), reverse=True)
 
-    # ===== VARIANT SUMMARY (in-memory) =====
-    variant_counts = df['variant'].value_counts().to_dict()
-    variants = [
-        {
-            'name': k,
-            'count': int(v),
-            'percentage': round((v / total_stock * 100), 1)
-        }
-        for k, v in variant_counts.items()
-    ]
-    variants = sorted(variants, key=lambda x: x['count'], reverse=True)
+    # ===== OVERALL MODEL / COLOR / VARIANT SUMMARIES (in-memory) =====
+    models, colors, variants = (
+        [
+            {
+                'name': k,
+                'count': v,
+                'percentage': round((v / total_stock * 100), 1)
+            }
+            for k, v in _ranked(counts)
+        ]
+        for counts in (model_counts, color_counts, variant_counts)
+    )
 
     # ===== MODEL-VARIANT BREAKDOWN (in-memory) =====
     model_variant_summary = []
-
-    model_grouped = df.groupby('model')
-    for model, model_df in model_grouped:
-        # Variant breakdown for this model
-        variant_counts = model_df['variant'].value_counts().to_dict()
-
-        # Color breakdown for this model
-        color_counts = model_df['color'].value_counts().to_dict()
-
-        # Branch-wise breakdown for this model
-        branch_counts = model_df['branch_name'].value_counts().to_dict()
-
-        model_total = len(model_df)
+    for model, model_total in sorted(model_counts.items()):
         model_percentage = round((model_total / total_stock * 100), 1)
 
         model_variant_summary.append({
@@ -1550,30 +1849,30 @@ async def stock_summary_report(
             'variants': [
                 {
                     'name': k,
-                    'count': int(v),
+                    'count': v,
                     'percentage': round((v / model_total * 100), 1)
                 }
-                for k, v in sorted(variant_counts.items(), key=lambda x: x[1], reverse=True)
+                for k, v in _ranked(model_variants[model])
             ],
             'colors': [
                 {
                     'name': k,
-                    'count': int(v),
+                    'count': v,
                     'percentage': round((v / model_total * 100), 1)
                 }
-                for k, v in sorted(color_counts.items(), key=lambda x: x[1], reverse=True)
+                for k, v in _ranked(model_colors[model])
             ],
             'branches': [
                 {
                     'name': k,
-                    'count': int(v)
+                    'count': v
                 }
-                for k, v in sorted(branch_counts.items(), key=lambda x: x[1], reverse=True)
+                for k, v in _ranked(model_branches[model])
             ]
         })
 
     # Sort by total descending
-    model_variant_summary = sorted(model_variant_summary, key=lambda x: x['total'], reverse=True)
+    model_variant_summary = sorted(model_variant_summary, key=itemgetter('total'), reverse=True)
 
     return templates.TemplateResponse(
         "reports_stock_summary.html",
@@ -1593,61 +1892,32 @@ async def stock_summary_report(
 
 # ==================== HMSI INWARD REPORT ====================
 @router.get("/hmsi-inward", response_class=HTMLResponse)
-async def hmsi_inward_report(
+def hmsi_inward_report(
         request: Request,
         from_date: str = Query(None),
         to_date: str = Query(None),
+        context: dict = Depends(current_context),
+        branch_ids: list = Depends(managed_branch_ids),
         db: Session = Depends(get_db)
 ):
     """HMSI Inward Report - OEM Stock Receipts"""
 
-    if not check_auth(request):
-        return RedirectResponse(url="/login")
-
-    context = get_context_data(request, db)
-    active_branch_id = context["active_context"]
-
     # Set default date range (last 30 days)
+    now = datetime.now()
     if not from_date:
-        from_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        from_date = (now - timedelta(days=30)).strftime("%Y-%m-%d")
     if not to_date:
-        to_date = datetime.now().strftime("%Y-%m-%d")
+        to_date = now.strftime("%Y-%m-%d")
 
     from_dt = datetime.strptime(from_date, "%Y-%m-%d").date()
     to_dt = datetime.strptime(to_date, "%Y-%m-%d").date()
 
-    # Get managed branches
-    managed_branches = branch_service.get_managed_branches(db, active_branch_id)
-    branch_ids = [branch.Branch_ID for branch in managed_branches]
-
-    # Aggregate data across all managed branches
-    all_summary_data = []
-    all_load_data = []
-    all_daily_data = []
-
-    for branch_id in branch_ids:
-        # Get summary data
-        summary_df = report_service.get_oem_inward_summary(db, branch_id, from_dt, to_dt)
-        if not summary_df.empty:
-            summary_df['Branch_ID'] = branch_id
-            all_summary_data.append(summary_df)
-
-        # Get load data
-        load_df = report_service.get_oem_inward_by_load(db, branch_id, from_dt, to_dt)
-        if not load_df.empty:
-            load_df['Branch_ID'] = branch_id
-            all_load_data.append(load_df)
-
-        # Get daily trend
-        daily_df = report_service.get_oem_inward_daily_trend(db, branch_id, from_dt, to_dt)
-        if not daily_df.empty:
-            daily_df['Branch_ID'] = branch_id
-            all_daily_data.append(daily_df)
-
-    # Combine all data
-    summary_df = pd.concat(all_summary_data) if all_summary_data else pd.DataFrame()
-    load_df = pd.concat(all_load_data) if all_load_data else pd.DataFrame()
-    daily_df = pd.concat(all_daily_data) if all_daily_data else pd.DataFrame()
+    # One grouped query per dataset across all managed branches
+    summary_df = report_service.get_oem_inward_summary(db, branch_ids, from_dt, to_dt)
+    load_df = report_service.get_oem_inward_by_load(db, branch_ids, from_dt, to_dt)
+    daily_df = report_service.get_oem_inward_daily_trend(db, branch_ids, from_dt, to_dt)
+
+    branch_map = branch_service.get_managed_branch_names(db, context["active_context"])
 
     # Calculate summary metrics
     total_received = int(summary_df['Total_Received'].sum()) if not summary_df.empty else 0
@@ -1672,21 +1942,17 @@ async def hmsi_inward_report(
     # Format summary data for template (grouped by Model)
     model_summary = []
     if not summary_df.empty:
-        for model in summary_df['Model'].unique():
-            model_data = summary_df[summary_df['Model'] == model]
-
-            variants = []
-            for _, row in model_data.iterrows():
-                # Get branch name
-                branch = db.query(Branch).filter(Branch.Branch_ID == row['Branch_ID']).first()
-                branch_name = branch.Branch_Name if branch else 'Unknown'
-
-                variants.append({
-                    'variant': row['Variant'],
-                    'color': row['Color'],
-                    'quantity': int(row['Total_Received']),
-                    'branch': branch_name
-                })
+        # One pass over the groups (first-seen order) instead of a boolean mask per model
+        for model, model_data in summary_df.groupby('Model', sort=False):
+            variants = [
+                {
+                    'variant': row.Variant,
+                    'color': row.Color,
+                    'quantity': int(row.Total_Received),
+                    'branch': branch_map.get(row.Branch_ID, 'Unknown')
+                }
+                for row in model_data.itertuples(index=False)
+            ]
 
             model_total = int(model_data['Total_Received'].sum())
             model_percentage = round((model_total / total_received * 100), 1) if total_received > 0 else 0
@@ -1699,57 +1965,50 @@ async def hmsi_inward_report(
             })
 
         # Sort by total descending
-        model_summary = sorted(model_summary, key=lambda x: x['total'], reverse=True)
+        model_summary = sorted(model_summary, key=itemgetter('total'), reverse=True)
 
     # Format load details for template
     load_details = []
     if not load_df.empty:
         # Group by load number
-        for load_num in load_df['Load_Number'].unique():
-            load_data = load_df[load_df['Load_Number'] == load_num]
-
+        for load_num, load_data in load_df.groupby('Load_Number', sort=False):
             # Get first record for date and branch
             first_record = load_data.iloc[0]
-            branch = db.query(Branch).filter(Branch.Branch_ID == first_record['Branch_ID']).first()
 
             # Get vehicles in this load
-            vehicles = []
-            for _, row in load_data.iterrows():
-                vehicles.append({
-                    'model': row['Model'],
-                    'variant': row['Variant'],
-                    'color': row['Color'],
-                    'quantity': int(row['Quantity'])
-                })
+            vehicles = [
+                {
+                    'model': row.Model,
+                    'variant': row.Variant,
+                    'color': row.Color,
+                    'quantity': int(row.Quantity)
+                }
+                for row in load_data.itertuples(index=False)
+            ]
 
             load_details.append({
                 'date': first_record['Date'].strftime("%d %b %Y"),
                 'load_number': load_num,
-                'branch': branch.Branch_Name if branch else 'Unknown',
+                'branch': branch_map.get(first_record['Branch_ID'], 'Unknown'),
                 'total_vehicles': int(load_data['Quantity'].sum()),
                 'vehicles': vehicles
             })
 
         # Sort by date descending
-        load_details = sorted(load_details, key=lambda x: x['date'], reverse=True)
+        load_details = sorted(load_details, key=itemgetter('date'), reverse=True)
 
     # Format daily trend for chart
     daily_trend = []
     if not daily_df.empty:
-        # Group by date and sum
-        daily_grouped = daily_df.groupby('Date').agg({
-            'Loads': 'sum',
-            'Total_Vehicles': 'sum'
-        }).reset_index()
-
-        max_vehicles = daily_grouped['Total_Vehicles'].max()
+        # Already one row per day from SQL; only the last 14 are charted
+        max_vehicles = daily_df['Total_Vehicles'].max()
 
-        for _, row in daily_grouped.iterrows():
-            percentage = round((row['Total_Vehicles'] / max_vehicles * 100)) if max_vehicles > 0 else 0
+        for row in daily_df.tail(14).itertuples(index=False):
+            percentage = round((row.Total_Vehicles / max_vehicles * 100)) if max_vehicles > 0 else 0
             daily_trend.append({
-                'date': row['Date'].strftime("%d %b"),
-                'loads': int(row['Loads']),
-                'vehicles': int(row['Total_Vehicles']),
+                'date': row.Date.strftime("%d %b"),
+                'loads': int(row.Loads),
+                'vehicles': int(row.Total_Vehicles),
                 'percentage': percentage
             })
 
@@ -1763,7 +2022,7 @@ async def hmsi_inward_report(
             "summary_metrics": summary_metrics,
             "model_summary": model_summary,
             "load_details": load_details,
-            "daily_trend": daily_trend[-14:],  # Last 14 days
+            "daily_trend": daily_trend,
             "current_page": "reports"
         }
     )
@@ -1,39 +1,16 @@
 # routers/task_manager.py
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from database import get_db
-from services import branch_service
 from models import SalesRecord, VehicleMaster, User, Branch
+from routers.overview import check_auth, get_active_context
+from utils.cache import clear_report_caches
+from utils.templating import templates
 
 router = APIRouter(prefix="/task-manager", tags=["task_manager"])
-templates = Jinja2Templates(directory="templates")
-
-
-def check_auth(request: Request):
-    if not request.session.get("logged_in"):
-        return False
-    return True
-
-
-def get_active_context(request: Request, db: Session):
-    """Get the active branch context for the user"""
-    user_branch_id = request.session.get("branch_id")
-
-    if user_branch_id:
-        return user_branch_id
-
-    active_context = request.session.get("active_context")
-    if not active_context:
-        head_branches = branch_service.get_head_branches(db)
-        if head_branches:
-            active_context = head_branches[0].Branch_ID
-            request.session["active_context"] = active_context
-
-    return active_context
 
 
 @router.get("", response_class=HTMLResponse)
@@ -49,7 +26,7 @@ async def task_manager_page(request: Request, db: Session = Depends(get_db)):
 
     # Get active context
     active_branch_id = get_active_context(request, db)
-    active_branch = db.query(Branch).filter(Branch.Branch_ID == active_branch_id).first()
+    active_branch = db.get(Branch, active_branch_id) if active_branch_id else None
     branch_name = active_branch.Branch_Name if active_branch else "N/A"
 
     # For PDI Manager: ONLY show their own branch (not sub-branches)
@@ -88,12 +65,10 @@ async def task_manager_page(request: Request, db: Session = Depends(get_db)):
         SalesRecord.fulfillment_status == "PDI In Progress"
     ).all()
 
-    # Get PDI completed in last 24 hours
+    # Get PDI completed in last 24 hours (range scan on Branch_ID, status, completion date)
     twenty_four_hours_ago = datetime.now() - timedelta(hours=24)
     completed_last_24h = db.query(
-        SalesRecord, VehicleMaster, Branch
-    ).join(
-        VehicleMaster, SalesRecord.chassis_no == VehicleMaster.chassis_no, isouter=True
+        SalesRecord, Branch
     ).join(
         Branch, SalesRecord.Branch_ID == Branch.Branch_ID
     ).filter(
@@ -139,7 +114,7 @@ async def task_manager_page(request: Request, db: Session = Depends(get_db)):
             "pdi_assigned_to": sale.pdi_assigned_to or "N/A",
             "completion_date": sale.pdi_completion_date,
             "branch": branch.Branch_Name
-        } for sale, vehicle, branch in completed_last_24h
+        } for sale, branch in completed_last_24h
     ]
 
     return templates.TemplateResponse(
@@ -172,15 +147,20 @@ async def assign_task(
         return RedirectResponse(url="/login")
 
     # Get mechanic username
-    mechanic = db.query(User).filter(User.id == mechanic_id).first()
+    mechanic = db.get(User, mechanic_id)
     if not mechanic:
         return RedirectResponse(url="/task-manager", status_code=303)
 
-    # Update sale record
-    sale = db.query(SalesRecord).filter(SalesRecord.id == sale_id).first()
-    if sale:
-        sale.pdi_assigned_to = mechanic.username
-        sale.fulfillment_status = "PDI In Progress"
+    # Update sale record in a single UPDATE (no SELECT/hydrate round-trip)
+    updated = db.query(SalesRecord).filter(SalesRecord.id == sale_id).update(
+        {
+            SalesRecord.pdi_assigned_to: mechanic.username,
+            SalesRecord.fulfillment_status: "PDI In Progress"
+        },
+        synchronize_session=False
+    )
+    if updated:
         db.commit()
+        clear_report_caches()
 
     return RedirectResponse(url="/task-manager", status_code=303)
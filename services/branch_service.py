@@ -1,7 +1,15 @@
 # services/branch_service.py
+from typing import Dict, List
+import time
+
 from sqlalchemy.orm import Session
 import models
 
+# Branch hierarchy rarely changes, so managed branches are cached briefly
+_managed_cache = {}
+_managed_timestamp = {}
+MANAGED_IDS_TTL = 60  # seconds
+
 
 def get_all_branches(db: Session):
     return db.query(models.Branch).order_by(models.Branch.Branch_ID).all()
@@ -19,9 +27,31 @@ def get_managed_branches(db: Session, head_branch_id: str):
         models.BranchHierarchy, models.Branch.Branch_ID == models.BranchHierarchy.Sub_Branch_ID
     ).filter(models.BranchHierarchy.Parent_Branch_ID == head_branch_id).all()
 
-    head_branch = db.query(models.Branch).filter(models.Branch.Branch_ID == head_branch_id).first()
+    head_branch = db.get(models.Branch, head_branch_id) if head_branch_id else None
     return [head_branch] + sub_branches if head_branch else sub_branches
 
 
+def get_managed_branch_names(db: Session, head_branch_id: str) -> Dict[str, str]:
+    """Returns {Branch_ID: Branch_Name} for all branches managed by this Head Branch (cached, head first)."""
+    cache_key = str(head_branch_id)
+    current_time = time.time()
+
+    if cache_key in _managed_cache:
+        if current_time - _managed_timestamp[cache_key] < MANAGED_IDS_TTL:
+            return dict(_managed_cache[cache_key])
+
+    branch_names = {branch.Branch_ID: branch.Branch_Name for branch in get_managed_branches(db, head_branch_id)}
+
+    _managed_cache[cache_key] = branch_names
+    _managed_timestamp[cache_key] = current_time
+
+    return dict(branch_names)
+
+
+def get_managed_branch_ids(db: Session, head_branch_id: str) -> List[str]:
+    """Returns the IDs of all branches managed by this Head Branch (cached)."""
+    return list(get_managed_branch_names(db, head_branch_id))
+
+
 def get_users_by_role(db: Session, role: str):
     return db.query(models.User).filter(models.User.role == role).all()
@@ -46,9 +46,11 @@ def get_stock_aging_report(db: Session, branch_id: str = None) -> pd.DataFrame:
 
 
 
-def get_oem_inward_summary(db: Session, branch_id: str, start_date: date, end_date: date) -> pd.DataFrame:
+def get_oem_inward_summary(db: Session, branch_ids: List[str], start_date: date, end_date: date) -> pd.DataFrame:
+    """OEM inward totals per model/variant/color for every branch in one grouped query"""
     query = (
         db.query(
+            models.InventoryTransaction.Current_Branch_ID.label("Branch_ID"),
             models.InventoryTransaction.Model,
             models.InventoryTransaction.Variant,
             models.InventoryTransaction.Color,
@@ -56,12 +58,11 @@ def get_oem_inward_summary(db: Session, branch_id: str, start_date: date, end_da
         )
         .filter(
             models.InventoryTransaction.Transaction_Type == TransactionType.INWARD_OEM,
-            models.InventoryTransaction.Current_Branch_ID == branch_id,
-            models.InventoryTransaction.Date >= start_date,
-            models.InventoryTransaction.Date <= end_date
+            models.InventoryTransaction.Current_Branch_ID.in_(branch_ids),
+            models.InventoryTransaction.Date.between(start_date, end_date)
         )
-        .group_by(models.InventoryTransaction.Model, models.InventoryTransaction.Variant,
-                  models.InventoryTransaction.Color)
+        .group_by(models.InventoryTransaction.Current_Branch_ID, models.InventoryTransaction.Model,
+                  models.InventoryTransaction.Variant, models.InventoryTransaction.Color)
         .order_by(models.InventoryTransaction.Model, models.InventoryTransaction.Variant)
     )
     return pd.read_sql(query.statement, db.get_bind())
@@ -113,8 +114,7 @@ def get_sales_report(db: Session, start_date: date, end_date: date) -> Dict[str,
             Branch, Branch.Branch_ID == InventoryTransaction.Current_Branch_ID
         ).filter(
             InventoryTransaction.Transaction_Type == "SALE",
-            InventoryTransaction.Date >= start_date,
-            InventoryTransaction.Date <= end_date
+            InventoryTransaction.Date.between(start_date, end_date)
         ).group_by(
             Branch.Branch_Name,
             InventoryTransaction.Model,
@@ -179,8 +179,7 @@ def get_branch_transfer_summary(db: Session, from_branch_id: int, start_date: da
         ).filter(
             models.InventoryTransaction.Transaction_Type == TransactionType.OUTWARD_TRANSFER,
             models.InventoryTransaction.Current_Branch_ID == from_branch_id,
-            models.InventoryTransaction.Date >= start_date,
-            models.InventoryTransaction.Date <= end_date
+            models.InventoryTransaction.Date.between(start_date, end_date)
         ).group_by(
             ToBranch.Branch_Name,
             InventoryTransaction.Model,
@@ -225,10 +224,11 @@ def get_branch_transfer_summary(db: Session, from_branch_id: int, start_date: da
 
 
 
-def get_oem_inward_by_load(db: Session, branch_id: str, start_date: date, end_date: date) -> pd.DataFrame:
+def get_oem_inward_by_load(db: Session, branch_ids: List[str], start_date: date, end_date: date) -> pd.DataFrame:
     """Get OEM inward details grouped by load number"""
     query = (
         db.query(
+            models.InventoryTransaction.Current_Branch_ID.label("Branch_ID"),
             models.InventoryTransaction.Date,
             models.InventoryTransaction.Load_Number,
             models.InventoryTransaction.Model,
@@ -239,9 +239,8 @@ def get_oem_inward_by_load(db: Session, branch_id: str, start_date: date, end_da
         )
         .filter(
             models.InventoryTransaction.Transaction_Type == "INWARD",
-            models.InventoryTransaction.Current_Branch_ID == branch_id,
-            models.InventoryTransaction.Date >= start_date,
-            models.InventoryTransaction.Date <= end_date,
+            models.InventoryTransaction.Current_Branch_ID.in_(branch_ids),
+            models.InventoryTransaction.Date.between(start_date, end_date),
             models.InventoryTransaction.Remarks.like('%HMSI%')
         )
         .order_by(models.InventoryTransaction.Date.desc())
@@ -251,26 +250,32 @@ def get_oem_inward_by_load(db: Session, branch_id: str, start_date: date, end_da
     return df
 
 
-def get_oem_inward_daily_trend(db: Session, branch_id: str, start_date: date, end_date: date) -> pd.DataFrame:
-    """Get daily trend of OEM inward"""
-    query = (
+def get_oem_inward_daily_trend(db: Session, branch_ids: List[str], start_date: date, end_date: date) -> pd.DataFrame:
+    """Get daily trend of OEM inward (one row per day, branches summed in SQL)"""
+    per_branch = (
         db.query(
-            models.InventoryTransaction.Date,
+            models.InventoryTransaction.Date.label("Date"),
             func.count(func.distinct(models.InventoryTransaction.Load_Number)).label("Loads"),
             func.sum(models.InventoryTransaction.Quantity).label("Total_Vehicles")
         )
         .filter(
             models.InventoryTransaction.Transaction_Type == models.TransactionType.INWARD_OEM,
-            models.InventoryTransaction.Current_Branch_ID == branch_id,
-            models.InventoryTransaction.Date >= start_date,
-            models.InventoryTransaction.Date <= end_date,
+            models.InventoryTransaction.Current_Branch_ID.in_(branch_ids),
+            models.InventoryTransaction.Date.between(start_date, end_date),
             models.InventoryTransaction.Remarks.like('%HMSI%')
         )
-        .group_by(models.InventoryTransaction.Date)
-        .order_by(models.InventoryTransaction.Date)
+        .group_by(models.InventoryTransaction.Current_Branch_ID, models.InventoryTransaction.Date)
+        .subquery()
+    )
+    query = (
+        db.query(
+            per_branch.c.Date,
+            func.sum(per_branch.c.Loads).label("Loads"),
+            func.sum(per_branch.c.Total_Vehicles).label("Total_Vehicles")
+        )
+        .group_by(per_branch.c.Date)
+        .order_by(per_branch.c.Date)
     )
 
     df = pd.read_sql(query.statement, db.get_bind())
     return df
-
-
@@ -1,5 +1,6 @@
 # services/sales_service.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from sqlalchemy import select, union_all
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import models
@@ -16,31 +17,54 @@ def get_sales_records_by_status(db: Session, status: str, branch_id: str = None)
     return [record_to_dict(record) for record in records]
 
 
-def get_sales_records_for_mechanic(db: Session, mechanic_username: str, branch_id: str = None) -> List[Dict[str, Any]]:
-    """Get sales records assigned to a mechanic"""
-    query = db.query(models.SalesRecord).filter(
-        models.SalesRecord.pdi_assigned_to == mechanic_username,
-        models.SalesRecord.fulfillment_status == 'PDI In Progress'
+def get_mechanic_worklist(db: Session, mechanic_username: str, branch_id: str = None,
+                          completed_limit: int = 25) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Get a mechanic's pending PDIs and most recent PDIs completed in the last 48 hours
+    in one UNION ALL query, selecting only the columns the dashboard shows.
+    """
+    time_48h_ago = datetime.now(IST_TIMEZONE) - timedelta(days=2)
+    SalesRecord = models.SalesRecord
+    # Labels match the record_to_dict keys so rows convert straight to dicts
+    columns = (
+        SalesRecord.id.label('id'),
+        SalesRecord.DC_Number.label('dc_number'),
+        SalesRecord.chassis_no.label('chassis_no'),
+        SalesRecord.engine_no.label('engine_no'),
+        SalesRecord.Customer_Name.label('customer_name'),
+        SalesRecord.Model.label('model'),
+        SalesRecord.Variant.label('variant'),
+        SalesRecord.Paint_Color.label('color'),
+        SalesRecord.fulfillment_status.label('fulfillment_status'),
+        SalesRecord.pdi_completion_date.label('pdi_completion_date')
     )
+    scope = [SalesRecord.pdi_assigned_to == mechanic_username]
     if branch_id:
-        query = query.filter(models.SalesRecord.Branch_ID == branch_id)
+        scope.append(SalesRecord.Branch_ID == branch_id)
 
-    records = query.all()
-    return [record_to_dict(record) for record in records]
+    pending_rows = select(*columns).where(
+        *scope,
+        SalesRecord.fulfillment_status == 'PDI In Progress'
+    ).order_by(SalesRecord.id).subquery()
 
+    completed_rows = select(*columns).where(
+        *scope,
+        SalesRecord.fulfillment_status.in_(['PDI Complete', 'Insurance Done', 'TR Done']),
+        SalesRecord.pdi_completion_date >= time_48h_ago
+    ).order_by(SalesRecord.pdi_completion_date.desc()).limit(completed_limit).subquery()
 
-def get_completed_sales_last_48h(db: Session, branch_id: str = None) -> List[Dict[str, Any]]:
-    """Get completed sales in last 48 hours"""
-    time_48h_ago = datetime.now(IST_TIMEZONE) - timedelta(days=2)
-    query = db.query(models.SalesRecord).filter(
-        models.SalesRecord.fulfillment_status.in_(['PDI Complete', 'Insurance Done', 'TR Done']),
-        models.SalesRecord.pdi_completion_date >= time_48h_ago
-    )
-    if branch_id:
-        query = query.filter(models.SalesRecord.Branch_ID == branch_id)
+    stmt = union_all(select(pending_rows), select(completed_rows))
 
-    records = query.all()
-    return [record_to_dict(record) for record in records]
+    pending, completed = [], []
+    for record in db.execute(stmt).mappings():
+        if record['fulfillment_status'] == 'PDI In Progress':
+            pending.append(dict(record))
+        else:
+            completed.append(dict(record))
+
+    # UNION ALL does not guarantee the subquery order is kept
+    completed.sort(key=lambda r: r['pdi_completion_date'], reverse=True)
+    return pending, completed
 
 
 def record_to_dict(record: models.SalesRecord) -> Dict[str, Any]:
@@ -65,10 +89,14 @@ def record_to_dict(record: models.SalesRecord) -> Dict[str, Any]:
 def assign_pdi_mechanic(db: Session, sale_id: int, mechanic_name: str):
     """Assign PDI to a mechanic"""
     try:
-        record = db.query(models.SalesRecord).filter(models.SalesRecord.id == sale_id).first()
-        if record:
-            record.pdi_assigned_to = mechanic_name
-            record.fulfillment_status = "PDI In Progress"
+        updated = db.query(models.SalesRecord).filter(models.SalesRecord.id == sale_id).update(
+            {
+                models.SalesRecord.pdi_assigned_to: mechanic_name,
+                models.SalesRecord.fulfillment_status: "PDI In Progress"
+            },
+            synchronize_session=False
+        )
+        if updated:
             db.commit()
             return True, "Mechanic assigned successfully"
         return False, "Sales record not found"
@@ -80,12 +108,11 @@ def assign_pdi_mechanic(db: Session, sale_id: int, mechanic_name: str):
 def complete_pdi(db: Session, sale_id: int, chassis_no: str, engine_no: str = None, dc_number: str = None):
     """Complete PDI and link vehicle with validation"""
     try:
-        record = db.query(models.SalesRecord).filter(models.SalesRecord.id == sale_id).first()
-        vehicle = db.query(models.VehicleMaster).filter(models.VehicleMaster.chassis_no == chassis_no).first()
-
+        record = db.get(models.SalesRecord, sale_id)
         if not record:
             return False, "Sales Record not found."
 
+        vehicle = db.query(models.VehicleMaster).filter(models.VehicleMaster.chassis_no == chassis_no).first()
         if not vehicle:
             return False, f"Chassis '{chassis_no}' not found in inventory."
 
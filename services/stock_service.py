@@ -121,21 +121,6 @@ def get_all_product_mappings(db: Session) -> pd.DataFrame:
     return pd.read_sql(query.statement, db.get_bind())
 
 
-def get_vehicles_in_load(db: Session, branch_id: str, load_reference: str) -> pd.DataFrame:
-    query = db.query(
-        models.VehicleMaster.chassis_no.label("chassis_no"),   # ← fix
-        models.VehicleMaster.model.label("model"),             # ← fix
-        models.VehicleMaster.variant.label("variant"),         # ← fix
-        models.VehicleMaster.color.label("color"),             # ← fix
-        models.VehicleMaster.engine_no.label("engine_no")      # ← fix
-    ).filter(
-        models.VehicleMaster.current_branch_id == branch_id,
-        models.VehicleMaster.load_reference_number == load_reference,
-        models.VehicleMaster.status == 'In Transit'
-    )
-    return pd.read_sql(query.statement, db.get_bind())
-
-
 # --- WRITES ---
 
 def add_product_mapping(db: Session, m_code: str, v_code: str, r_model: str, r_variant: str):
@@ -170,6 +155,7 @@ def log_bulk_inward_master(db: Session, current_branch_id: str, source: str, loa
     Logs a batch. 'initial_status' can be 'In Stock' (for CSV) or 'In Transit' (for S08).
     """
     try:
+        inward_txns = []
         for item in vehicle_batch:
             # Use the extracted load_reference if available, otherwise fallback to the manual one
             ref_no = item.get('load_reference', load_no)
@@ -190,13 +176,15 @@ def log_bulk_inward_master(db: Session, current_branch_id: str, source: str, loa
             # Only log the InventoryTransaction if it is actually IN STOCK.
             # If it's In Transit, we don't count it as inventory yet.
             if initial_status == 'In Stock':
-                db.add(models.InventoryTransaction(
+                inward_txns.append(models.InventoryTransaction(
                     Date=date_val, Transaction_Type=TransactionType.INWARD_OEM,
                     Current_Branch_ID=current_branch_id, Source_External=source,
                     Load_Number=ref_no, Remarks=remarks,
                     Model=item['model'], Variant=item['variant'], Color=item['color'], Quantity=1
                 ))
 
+        # Ledger rows are insert-only, so skip identity-map bookkeeping for them
+        db.bulk_save_objects(inward_txns)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -206,12 +194,17 @@ def log_bulk_inward_master(db: Session, current_branch_id: str, source: str, loa
 def log_bulk_transfer_master(db: Session, from_branch_id: str, to_branch_id: str, date_val: date, remarks: str,
                              chassis_list: List[str]):
     try:
+        # Fetch the whole batch in one query instead of one SELECT per chassis
+        vehicles = db.query(models.VehicleMaster).filter(
+            models.VehicleMaster.chassis_no.in_(chassis_list),
+            models.VehicleMaster.current_branch_id == from_branch_id,
+            models.VehicleMaster.status == 'In Stock'
+        ).all()
+        vehicle_map = {v.chassis_no: v for v in vehicles}
+
+        transfer_txns = []
         for chassis_no in chassis_list:
-            vehicle = db.query(models.VehicleMaster).filter(
-                models.VehicleMaster.chassis_no == chassis_no,
-                models.VehicleMaster.current_branch_id == from_branch_id,
-                models.VehicleMaster.status == 'In Stock'
-            ).first()
+            vehicle = vehicle_map.get(chassis_no)
 
             if not vehicle:
                 raise Exception(f"Vehicle {chassis_no} not found/available at {from_branch_id}.")
@@ -220,18 +213,20 @@ def log_bulk_transfer_master(db: Session, from_branch_id: str, to_branch_id: str
             vehicle.dc_number = remarks
 
             # Double Entry Logging
-            db.add(models.InventoryTransaction(
+            transfer_txns.append(models.InventoryTransaction(
                 Date=date_val, Transaction_Type=TransactionType.OUTWARD_TRANSFER,
                 Current_Branch_ID=from_branch_id, To_Branch_ID=to_branch_id,
                 Remarks=f"Transfer OUT to {to_branch_id}. {remarks}",
                 Model=vehicle.model, Variant=vehicle.variant, Color=vehicle.color, Quantity=1
             ))
-            db.add(models.InventoryTransaction(
+            transfer_txns.append(models.InventoryTransaction(
                 Date=date_val, Transaction_Type=TransactionType.INWARD_TRANSFER,
                 Current_Branch_ID=to_branch_id, From_Branch_ID=from_branch_id,
                 Remarks=f"Transfer IN from {from_branch_id}. {remarks}",
                 Model=vehicle.model, Variant=vehicle.variant, Color=vehicle.color, Quantity=1
             ))
+
+        db.bulk_save_objects(transfer_txns)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -315,13 +310,38 @@ def bulk_correct_stock(db: Session, update_batch: List[Dict], correction_date: d
         return False, f"FATAL Database Error: {e}", error_log
 
 
-def get_pending_loads(db: Session, branch_id: str) -> List[str]:
-    """Returns a list of unique Load Reference Numbers that are currently 'In Transit'."""
-    results = db.query(models.VehicleMaster.load_reference_number).filter(
+def get_in_transit_vehicles_by_load(db: Session, branch_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Returns {load_reference: [vehicle dicts]} for every 'In Transit' vehicle at the branch.
+    Rows are streamed in batches instead of one query (and DataFrame) per load.
+    """
+    rows = db.query(
+        models.VehicleMaster.load_reference_number,
+        models.VehicleMaster.chassis_no,
+        models.VehicleMaster.model,
+        models.VehicleMaster.variant,
+        models.VehicleMaster.color,
+        models.VehicleMaster.engine_no
+    ).filter(
         models.VehicleMaster.current_branch_id == branch_id,
-        models.VehicleMaster.status == 'In Transit'
-    ).distinct().all()
-    return [r[0] for r in results if r[0]]
+        models.VehicleMaster.status == 'In Transit',
+        models.VehicleMaster.load_reference_number.isnot(None)
+    ).order_by(
+        models.VehicleMaster.load_reference_number
+    ).yield_per(500)
+
+    loads: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if not row.load_reference_number:
+            continue
+        loads.setdefault(row.load_reference_number, []).append({
+            "chassis_no": row.chassis_no,
+            "model": row.model,
+            "variant": row.variant,
+            "color": row.color,
+            "engine_no": row.engine_no
+        })
+    return loads
 
 
 def receive_load(db: Session, branch_id: str, load_reference: str):
@@ -342,13 +362,14 @@ def receive_load(db: Session, branch_id: str, load_reference: str):
 
         today = date.today()
 
+        inward_txns = []
         for v in vehicles:
             # Update Status
             v.status = 'In Stock'
             v.date_received = today  # Update receipt date to TODAY (actual arrival)
 
             # Now we Log the Transaction (Stock Increase)
-            db.add(models.InventoryTransaction(
+            inward_txns.append(models.InventoryTransaction(
                 Date=today,
                 Transaction_Type=TransactionType.INWARD_OEM,
                 Current_Branch_ID=branch_id,
@@ -361,6 +382,7 @@ def receive_load(db: Session, branch_id: str, load_reference: str):
                 Quantity=1
             ))
 
+        db.bulk_save_objects(inward_txns)
         db.commit()
         return True, f"Successfully received {len(vehicles)} vehicles from Load {load_reference}."
     except Exception as e:
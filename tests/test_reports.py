@@ -0,0 +1,93 @@
+# tests/test_reports.py
+"""Report pages for an owner whose active context manages no branches, against a throwaway SQLite DB"""
+import os
+
+for key in ("DB_HOST", "DB_USER", "DB_PASS", "DB_NAME"):
+    os.environ.pop(key, None)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import main
+from database import Base, get_db
+from models import User
+from routers import reports
+from utils.cache import clear_report_caches
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reports.db'}")
+    Base.metadata.create_all(bind=engine)
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with TestSession() as db:
+        db.add(User(username="owner", hashed_password="x", salt="00", role="Owner", phone_number="111"))
+        db.commit()
+
+    def override_get_db():
+        with TestSession() as db:
+            yield db
+
+    # The dashboard and CSV streams open their own sessions
+    monkeypatch.setattr(reports, "SessionLocal", TestSession)
+    main.app.dependency_overrides[get_db] = override_get_db
+    clear_report_caches()
+
+    with TestClient(main.app) as test_client:
+        response = test_client.post("/login", data={"phone_number": "111"}, follow_redirects=False)
+        assert response.status_code == 303
+        yield test_client
+
+    main.app.dependency_overrides.clear()
+    clear_report_caches()
+    engine.dispose()
+
+
+def test_dashboard_without_managed_branches(client):
+    response = client.get("/reports")
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert client.get("/reports", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_stock_movement_without_managed_branches(client):
+    assert client.get("/reports/stock-movement").status_code == 200
+
+    response = client.get("/reports/stock-movement", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.text.splitlines() == [
+        "Date,Type,Branch,From Branch,To Branch,Model,Variant,Color,Quantity,Load Number"
+    ]
+
+
+def test_branch_statistics_without_managed_branches(client):
+    assert reports.get_branch_statistics(None, []) == []
+
+    response = client.get("/reports/export", params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.text == reports.BRANCH_CSV_HEADER
+
+
+@pytest.mark.parametrize("path", [
+    "/reports/model-wise",
+    "/reports/model-wise?model=Activa&format=csv",
+    "/reports/aging-inventory",
+    "/reports/aging-inventory?format=csv",
+    "/reports/transfers",
+    "/reports/receiving",
+    "/reports/in-transit",
+    "/reports/load-tracking",
+    "/reports/load-tracking?load_number=L1",
+    "/reports/daily-sales-transfers",
+    "/reports/debug-sales-data",
+    "/reports/stock-summary",
+    "/reports/hmsi-inward",
+])
+def test_report_pages_without_managed_branches(client, path):
+    assert client.get(path).status_code == 200
@@ -0,0 +1,33 @@
+# utils/cache.py
+"""Short-lived in-process caches for overview counters and report aggregates"""
+
+# Overview counters are identical for everyone viewing the same branches
+counters_cache = {}
+counters_timestamp = {}
+COUNTERS_TTL = 30  # seconds
+
+# Dashboard aggregates, keyed by managed branches and date range
+dashboard_cache = {}
+dashboard_timestamp = {}
+DASHBOARD_TTL = 120  # seconds
+
+# Per-branch stock/PDI counts, shared by the dashboard and the CSV export
+branch_stats_cache = {}
+branch_stats_timestamp = {}
+BRANCH_STATS_TTL = 30  # seconds
+
+# Inward source names offered as receiving report filters
+receiving_sources_cache = {}
+receiving_sources_timestamp = {}
+RECEIVING_SOURCES_TTL = 300  # seconds
+
+
+def clear_report_caches():
+    """Drop cached counters and report aggregates after stock moves or a PDI status change"""
+    for cache in (
+            counters_cache, counters_timestamp,
+            dashboard_cache, dashboard_timestamp,
+            branch_stats_cache, branch_stats_timestamp,
+            receiving_sources_cache, receiving_sources_timestamp
+    ):
+        cache.clear()
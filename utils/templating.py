@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# Compiled template cache, shared across workers
+JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR", "/tmp/jinja-cache")
+Path(JINJA_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+
+# Only re-check template mtimes when developing
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+
+env = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=True,
+    bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR),
+    auto_reload=DEBUG,
+    cache_size=400
+)
+
+
+def format_date(value, fmt: str) -> str:
+    """Jinja filter: {{ row.Date|strftime('%d %b %Y') }}, empty for missing dates"""
+    return value.strftime(fmt) if value else ""
+
+
+env.filters["strftime"] = format_date
+
+# Single templates instance used by every router
+templates = Jinja2Templates(env=env)
+
+
+def warm_templates():
+    """Compile every template up front so the first request doesn't pay for parsing."""
+    for name in env.list_templates(extensions=["html"]):
+        env.get_template(name)